@@ -4,19 +4,44 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 
-from app.database import Base
-import app.models  # noqa: F401
+from app.database import SQLALCHEMY_DATABASE_URL, sync_database_url
+# Метаданные моделей: у app.models своя declarative_base, не app.database.Base
+from app.models import Base
 
 config = context.config
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-db_url = os.environ["DATABASE_URL"].replace("asyncpg", "psycopg2")
+db_url = sync_database_url(os.getenv("DATABASE_URL", SQLALCHEMY_DATABASE_URL))
 config.set_main_option("sqlalchemy.url", db_url)
 
 target_metadata = Base.metadata
 
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Секции журнала событий и FTS-таблицы SQLite создаются не моделями
+    if type_ == "table" and reflected and compare_to is None:
+        return not (name.startswith("events_") or name.startswith("flashcards_fts"))
+    # Индексы с ddl_if(dialect=...) существуют только на своём диалекте
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if type_ == "index" and ddl_if is not None and ddl_if.dialect:
+        return context.get_context().dialect.name == ddl_if.dialect
+    return True
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=db_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -25,9 +50,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite не умеет большинство ALTER TABLE: изменения идут через пересоздание таблицы
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
 
         with context.begin_transaction():
             context.run_migrations()
 
-run_migrations_online()
\ No newline at end of file
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,124 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 02:46:43.108398
+
+Исходная схема — то, что создавал Base.metadata.create_all до перехода на
+миграции: пользователи, файлы, карточки, refresh-токены и два журнала
+(action_history, action_logs). Уже существующую базу с такой схемой
+отмечают командой `alembic stamp 0001` и затем делают `alembic upgrade head`
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('user', 'admin', name='userrole'), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+    op.create_table('pdf_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('file_key', sa.String(length=500), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.Enum('UPLOADED', 'PROCESSING', 'PROCESSED', 'FAILED', name='processingstatus'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_key')
+    )
+    op.create_index(op.f('ix_pdf_files_user_id'), 'pdf_files', ['user_id'], unique=False)
+
+    op.create_table('refresh_tokens',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('revoked', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('flashcards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pdf_file_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('question', sa.Text(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('context', sa.Text(), nullable=True),
+    sa.Column('source', sa.String(), nullable=True),
+    sa.Column('is_hidden', sa.Boolean(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['pdf_file_id'], ['pdf_files.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_flashcards_pdf_file_id'), 'flashcards', ['pdf_file_id'], unique=False)
+    op.create_index(op.f('ix_flashcards_user_id'), 'flashcards', ['user_id'], unique=False)
+
+    op.create_table('action_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.Enum('UPLOAD', 'DOWNLOAD', 'DELETE', 'EDIT', 'GENERATE_CARDS', name='actiontype'), nullable=False),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['pdf_files.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_action_logs_file_id'), 'action_logs', ['file_id'], unique=False)
+    op.create_index(op.f('ix_action_logs_user_id'), 'action_logs', ['user_id'], unique=False)
+
+    op.create_table('action_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_action_history_user_id'), 'action_history', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_action_history_user_id'), table_name='action_history')
+    op.drop_table('action_history')
+    op.drop_index(op.f('ix_action_logs_user_id'), table_name='action_logs')
+    op.drop_index(op.f('ix_action_logs_file_id'), table_name='action_logs')
+    op.drop_table('action_logs')
+    op.drop_index(op.f('ix_flashcards_user_id'), table_name='flashcards')
+    op.drop_index(op.f('ix_flashcards_pdf_file_id'), table_name='flashcards')
+    op.drop_table('flashcards')
+    op.drop_table('refresh_tokens')
+    op.drop_index(op.f('ix_pdf_files_user_id'), table_name='pdf_files')
+    op.drop_table('pdf_files')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    if op.get_context().dialect.name == "postgresql":
+        for enum_name in ("actiontype", "processingstatus", "userrole"):
+            op.execute(f"DROP TYPE IF EXISTS {enum_name}")
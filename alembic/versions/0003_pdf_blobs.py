@@ -0,0 +1,58 @@
+"""pdf blobs
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 02:46:58.730551
+
+Дедупликация загрузок: одинаковое содержимое хранится в бакете один раз
+(pdf_blobs), pdf_files ссылаются на него по хэшу. Поэтому file_key у
+pdf_files больше не уникален. У старых файлов content_hash пустой
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# На SQLite уникальность file_key — безымянное ограничение, имя ему даёт соглашение
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def file_key_constraint() -> str:
+    if op.get_context().dialect.name == "postgresql":
+        return "pdf_files_file_key_key"
+    return "uq_pdf_files_file_key"
+
+
+def upgrade() -> None:
+    op.create_table('pdf_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('file_key', sa.String(length=500), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash'),
+    sa.UniqueConstraint('file_key')
+    )
+    with op.batch_alter_table('pdf_files', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_pdf_files_content_hash'), ['content_hash'], unique=False)
+        batch_op.drop_constraint(file_key_constraint(), type_='unique')
+
+
+def downgrade() -> None:
+    # Не пройдёт, если файлы с одинаковым содержимым уже делят один file_key
+    with op.batch_alter_table('pdf_files', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.create_unique_constraint(file_key_constraint(), ['file_key'])
+        batch_op.drop_index(batch_op.f('ix_pdf_files_content_hash'))
+        batch_op.drop_column('content_hash')
+    op.drop_table('pdf_blobs')
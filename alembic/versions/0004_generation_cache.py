@@ -0,0 +1,46 @@
+"""generation cache
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 02:47:04.915830
+
+Готовые карточки по (хэш документа, max_cards, модель, профиль генерации)
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('generation_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('max_cards', sa.Integer(), nullable=False),
+    sa.Column('model_id', sa.String(length=255), nullable=False),
+    sa.Column('profile', sa.String(length=64), nullable=False),
+    sa.Column('cards', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_generation_cache_content_hash'), 'generation_cache', ['content_hash'], unique=False)
+    op.create_index(op.f('ix_generation_cache_last_used_at'), 'generation_cache', ['last_used_at'], unique=False)
+    op.create_index(op.f('ix_generation_cache_model_id'), 'generation_cache', ['model_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_generation_cache_model_id'), table_name='generation_cache')
+    op.drop_index(op.f('ix_generation_cache_last_used_at'), table_name='generation_cache')
+    op.drop_index(op.f('ix_generation_cache_content_hash'), table_name='generation_cache')
+    op.drop_table('generation_cache')
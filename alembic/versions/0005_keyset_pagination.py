@@ -0,0 +1,37 @@
+"""keyset pagination
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 02:47:11.382904
+
+Ключи курсорной пагинации списка файлов и карточек файла и счётчик
+карточек у файла. У старых файлов card_count пустой: его досчитывает
+PDFRepository при первом чтении
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pdf_files', sa.Column('card_count', sa.Integer(), nullable=True))
+    op.create_index('ix_pdf_files_user_created_id', 'pdf_files', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_pdf_files_user_name_id', 'pdf_files', ['user_id', 'file_name', 'id'], unique=False)
+    op.create_index('ix_flashcards_pdf_file_id_id', 'flashcards', ['pdf_file_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flashcards_pdf_file_id_id', table_name='flashcards')
+    op.drop_index('ix_pdf_files_user_name_id', table_name='pdf_files')
+    op.drop_index('ix_pdf_files_user_created_id', table_name='pdf_files')
+    with op.batch_alter_table('pdf_files') as batch_op:
+        batch_op.drop_column('card_count')
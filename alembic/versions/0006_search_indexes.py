@@ -0,0 +1,70 @@
+"""search indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 02:47:18.650273
+
+Поиск подстроки по имени файла и email — триграммные GIN-индексы на
+Postgres. Полнотекстовый поиск по карточкам: на Postgres — GIN по
+tsvector, на SQLite — внешняя FTS5-таблица с триггерами, которая
+заполняется уже существующими карточками
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FLASHCARDS_SEARCH_INDEX = (
+    "CREATE INDEX ix_flashcards_search ON flashcards USING gin (to_tsvector('simple', "
+    "(((coalesce(question, '') || ' ') || coalesce(answer, '')) || ' ') || coalesce(context, '')))"
+)
+FLASHCARDS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+        question, answer, context, content='flashcards', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, question, answer, context)
+        VALUES (new.id, new.question, new.answer, new.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, question, answer, context)
+        VALUES ('delete', old.id, old.question, old.answer, old.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, question, answer, context)
+        VALUES ('delete', old.id, old.question, old.answer, old.context);
+        INSERT INTO flashcards_fts(rowid, question, answer, context)
+        VALUES (new.id, new.question, new.answer, new.context);
+    END""",
+    "INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+        op.create_index('ix_pdf_files_file_name_trgm', 'pdf_files', ['file_name'], unique=False, postgresql_using='gin', postgresql_ops={'file_name': 'gin_trgm_ops'})
+        op.execute(FLASHCARDS_SEARCH_INDEX)
+    else:
+        for statement in FLASHCARDS_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        op.drop_index('ix_flashcards_search', table_name='flashcards')
+        op.drop_index('ix_pdf_files_file_name_trgm', table_name='pdf_files')
+        op.drop_index('ix_users_email_trgm', table_name='users')
+    else:
+        # Триггеры висят на flashcards и без FTS-таблицы ломали бы запись карточек
+        for trigger in ("flashcards_fts_au", "flashcards_fts_ad", "flashcards_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS flashcards_fts")
@@ -0,0 +1,42 @@
+"""job progress
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 02:47:29.841562
+
+Прогресс обработки у задачи: его пишет воркер и читает поток событий
+/{file_id}/events. У уже существующих задач этап — queued, счётчики нулевые
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('processing_jobs') as batch_op:
+        batch_op.add_column(sa.Column('stage', sa.String(length=20), server_default='queued', nullable=False))
+        batch_op.add_column(sa.Column('pages_done', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('pages_total', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cards_done', sa.Integer(), server_default='0', nullable=False))
+    # server_default нужен только для существующих строк: в модели умолчания на стороне Python
+    with op.batch_alter_table('processing_jobs') as batch_op:
+        batch_op.alter_column('stage', server_default=None)
+        batch_op.alter_column('pages_done', server_default=None)
+        batch_op.alter_column('cards_done', server_default=None)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('processing_jobs') as batch_op:
+        batch_op.drop_column('cards_done')
+        batch_op.drop_column('pages_total')
+        batch_op.drop_column('pages_done')
+        batch_op.drop_column('stage')
@@ -0,0 +1,244 @@
+"""events
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 02:47:33.596180
+
+Единый журнал событий, секционированный по месяцам, вместо action_history
+и action_logs. Новые секции events_YYYYMM создаёт EventRepository; id на
+Postgres выдаёт общая для всех секций последовательность.
+
+Старые журналы переносятся в events по месяцам и затем удаляются. Одно
+действие раньше писалось в оба журнала (обработка, удаление файла): такая
+пара становится одним событием — текст из action_history, file_id и данные
+из action_logs. Откат журналы обратно не переносит: старые таблицы
+создаются пустыми.
+
+DDL секций и вставка записаны здесь, а не взяты из EventRepository:
+миграция не должна меняться вместе с кодом приложения
+
+"""
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+action_history = sa.table(
+    'action_history',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('created_at', sa.DateTime),
+    sa.column('action', sa.String), sa.column('filename', sa.String), sa.column('details', sa.Text),
+)
+action_logs = sa.table(
+    'action_logs',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('file_id', sa.Integer),
+    sa.column('action', sa.String), sa.column('details', sa.JSON), sa.column('timestamp', sa.DateTime),
+)
+pdf_files = sa.table('pdf_files', sa.column('id', sa.Integer), sa.column('file_name', sa.String))
+events = sa.table(
+    'events',
+    sa.column('created_at', sa.DateTime), sa.column('user_id', sa.Integer), sa.column('file_id', sa.Integer),
+    sa.column('action', sa.String), sa.column('filename', sa.String), sa.column('details', sa.Text),
+    sa.column('payload', sa.JSON),
+)
+
+# Имена ActionType в action_logs -> значения, которые пишет приложение
+LOG_ACTIONS = {
+    'UPLOAD': 'upload', 'DOWNLOAD': 'download', 'DELETE': 'delete',
+    'EDIT': 'edit', 'GENERATE_CARDS': 'generate_cards',
+}
+# Действия action_history, у которых была парная запись в action_logs
+HISTORY_ACTIONS = {'process': 'generate_cards', 'delete': 'delete'}
+# Пара писалась подряд, в одной или двух соседних транзакциях
+PAIR_WINDOW = timedelta(seconds=5)
+DOWNLOAD_DETAILS = "Ссылка на скачивание"
+
+
+def month_start(moment: datetime, shift: int = 0) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + shift
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def create_partition(bind, start: datetime) -> sa.TableClause:
+    # Секция месяца start; возвращает таблицу, в которую писать его строки
+    name = f"events_{start:%Y%m}"
+    if bind.dialect.name == "postgresql":
+        end = month_start(start, 1)
+        bind.execute(sa.text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+        # На Postgres строки идут через events: секцию выбирает сама база
+        return events
+    # На SQLite секция — отдельная таблица со своим автоинкрементным id
+    bind.execute(sa.text(
+        f"CREATE TABLE IF NOT EXISTS {name} ("
+        "id INTEGER NOT NULL, created_at DATETIME NOT NULL, user_id INTEGER NOT NULL, "
+        "file_id INTEGER, action VARCHAR(50) NOT NULL, filename VARCHAR(255), details TEXT, "
+        "payload JSON, PRIMARY KEY (id))"
+    ))
+    bind.execute(sa.text(f"CREATE INDEX IF NOT EXISTS ix_{name}_user_created_id ON {name} (user_id, created_at, id)"))
+    bind.execute(sa.text(f"CREATE INDEX IF NOT EXISTS ix_{name}_file_created ON {name} (file_id, created_at)"))
+    return sa.table(name, *[sa.column(c.name, c.type) for c in events.columns])
+
+
+def legacy_months(bind):
+    bounds = [
+        bind.execute(sa.select(sa.func.min(column), sa.func.max(column))).one()
+        for column in (action_history.c.created_at, action_logs.c.timestamp)
+    ]
+    moments = [moment for pair in bounds for moment in pair if moment is not None]
+    if not moments:
+        return
+    start, last = month_start(min(moments)), max(moments)
+    while start <= last:
+        yield start, month_start(start, 1)
+        start = month_start(start, 1)
+
+
+def merge_month(bind, start: datetime, end: datetime) -> list:
+    history = bind.execute(
+        sa.select(action_history)
+        .where(action_history.c.created_at >= start, action_history.c.created_at < end)
+        # Событие без пользователя некому показать, а events.user_id обязателен
+        .where(action_history.c.user_id.isnot(None))
+        .order_by(action_history.c.created_at, action_history.c.id)
+    ).all()
+    logs = bind.execute(
+        sa.select(action_logs, pdf_files.c.file_name)
+        .select_from(action_logs.outerjoin(pdf_files, pdf_files.c.id == action_logs.c.file_id))
+        .where(action_logs.c.timestamp >= start, action_logs.c.timestamp < end)
+        .order_by(action_logs.c.timestamp, action_logs.c.id)
+    ).all()
+
+    events = []
+    # Непарные пока строки истории по (пользователь, действие), по времени
+    candidates = defaultdict(deque)
+    for row in history:
+        action = HISTORY_ACTIONS.get(row.action, row.action)
+        event = {
+            "user_id": row.user_id, "action": action, "created_at": row.created_at,
+            "filename": row.filename, "details": row.details, "file_id": None, "payload": None,
+        }
+        events.append(event)
+        if row.action in HISTORY_ACTIONS:
+            candidates[(row.user_id, action)].append(event)
+
+    for row in logs:
+        action = LOG_ACTIONS.get(row.action, row.action.lower())
+        pair = take_pair(candidates.get((row.user_id, action)), row.timestamp)
+        if pair is not None:
+            pair.update(file_id=row.file_id, payload=row.details)
+            continue
+        events.append({
+            "user_id": row.user_id, "action": action, "created_at": row.timestamp,
+            "filename": row.file_name, "details": DOWNLOAD_DETAILS if action == "download" else None,
+            "file_id": row.file_id, "payload": row.details,
+        })
+    return events
+
+
+def take_pair(events, moment: datetime):
+    # Ближайшая по времени строка истории в пределах PAIR_WINDOW; взятая выбывает.
+    # Журналы идут по времени, поэтому слишком старые строки отбрасываются насовсем
+    if not events:
+        return None
+    while events and events[0]["created_at"] < moment - PAIR_WINDOW:
+        events.popleft()
+    best = None
+    for index, event in enumerate(events):
+        if event["created_at"] > moment + PAIR_WINDOW:
+            break
+        if best is None or abs(event["created_at"] - moment) < abs(events[best]["created_at"] - moment):
+            best = index
+    if best is None:
+        return None
+    event = events[best]
+    del events[best]
+    return event
+
+
+def backfill_events():
+    bind = op.get_bind()
+    for start, end in legacy_months(bind):
+        rows = merge_month(bind, start, end)
+        if rows:
+            bind.execute(sa.insert(create_partition(bind, start)), rows)
+
+
+def upgrade() -> None:
+    postgres = op.get_context().dialect.name == "postgresql"
+    if postgres:
+        op.execute("CREATE SEQUENCE IF NOT EXISTS events_id_seq")
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    if postgres:
+        op.execute("ALTER TABLE events ALTER COLUMN id SET DEFAULT nextval('events_id_seq')")
+    op.create_index('ix_events_file_created', 'events', ['file_id', 'created_at'], unique=False)
+    op.create_index('ix_events_user_created_id', 'events', ['user_id', 'created_at', 'id'], unique=False)
+
+    backfill_events()
+    op.drop_index(op.f('ix_action_history_user_id'), table_name='action_history')
+    op.drop_table('action_history')
+    op.drop_index(op.f('ix_action_logs_user_id'), table_name='action_logs')
+    op.drop_index(op.f('ix_action_logs_file_id'), table_name='action_logs')
+    op.drop_table('action_logs')
+    if postgres:
+        op.execute("DROP TYPE IF EXISTS actiontype")
+
+
+def downgrade() -> None:
+    op.create_table('action_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.Enum('UPLOAD', 'DOWNLOAD', 'DELETE', 'EDIT', 'GENERATE_CARDS', name='actiontype'), nullable=False),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['pdf_files.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_action_logs_file_id'), 'action_logs', ['file_id'], unique=False)
+    op.create_index(op.f('ix_action_logs_user_id'), 'action_logs', ['user_id'], unique=False)
+    op.create_table('action_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_action_history_user_id'), 'action_history', ['user_id'], unique=False)
+
+    # На Postgres секции удаляются вместе с events, на SQLite это отдельные таблицы
+    postgres = op.get_context().dialect.name == "postgresql"
+    if not postgres:
+        for name in sa.inspect(op.get_bind()).get_table_names():
+            if name.startswith("events_") and name[len("events_"):].isdigit():
+                op.drop_table(name)
+    op.drop_index('ix_events_user_created_id', table_name='events')
+    op.drop_index('ix_events_file_created', table_name='events')
+    op.drop_table('events')
+    if postgres:
+        op.execute("DROP SEQUENCE IF EXISTS events_id_seq")
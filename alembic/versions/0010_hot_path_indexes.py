@@ -0,0 +1,56 @@
+"""hot path indexes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 02:47:51.481067
+
+Составные индексы под запросы списка файлов, карточек файла и последней
+задачи файла. Индексы списка файлов частичные (только неудалённые файлы).
+Новые индексы создаются до удаления старых, на Postgres — CONCURRENTLY,
+чтобы не блокировать запись в таблицы
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_FILES = {
+    "sqlite_where": sa.text("is_deleted = 0"),
+    "postgresql_where": sa.text("NOT is_deleted"),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_pdf_files_live_user_created_id', 'pdf_files', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True, **LIVE_FILES)
+        op.create_index('ix_pdf_files_live_user_name_id', 'pdf_files', ['user_id', 'file_name', 'id'], unique=False, postgresql_concurrently=True, **LIVE_FILES)
+        op.create_index('ix_flashcards_pdf_user_id', 'flashcards', ['pdf_file_id', 'user_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_processing_jobs_pdf_file_id_id', 'processing_jobs', ['pdf_file_id', 'id'], unique=False, postgresql_concurrently=True)
+
+        # Старые индексы — префиксы новых или индексы с удалёнными файлами
+        op.drop_index('ix_pdf_files_user_created_id', table_name='pdf_files', postgresql_concurrently=True)
+        op.drop_index('ix_pdf_files_user_name_id', table_name='pdf_files', postgresql_concurrently=True)
+        op.drop_index('ix_flashcards_pdf_file_id_id', table_name='flashcards', postgresql_concurrently=True)
+        op.drop_index('ix_flashcards_pdf_file_id', table_name='flashcards', postgresql_concurrently=True)
+        op.drop_index('ix_processing_jobs_pdf_file_id', table_name='processing_jobs', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_processing_jobs_pdf_file_id', 'processing_jobs', ['pdf_file_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_flashcards_pdf_file_id', 'flashcards', ['pdf_file_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_flashcards_pdf_file_id_id', 'flashcards', ['pdf_file_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_pdf_files_user_name_id', 'pdf_files', ['user_id', 'file_name', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_pdf_files_user_created_id', 'pdf_files', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+        op.drop_index('ix_processing_jobs_pdf_file_id_id', table_name='processing_jobs', postgresql_concurrently=True)
+        op.drop_index('ix_flashcards_pdf_user_id', table_name='flashcards', postgresql_concurrently=True)
+        op.drop_index('ix_pdf_files_live_user_name_id', table_name='pdf_files', postgresql_concurrently=True)
+        op.drop_index('ix_pdf_files_live_user_created_id', table_name='pdf_files', postgresql_concurrently=True)
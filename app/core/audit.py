@@ -0,0 +1,110 @@
+import threading
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.models import get_msk_time
+from app.repositories.event_repository import EventRepository
+
+
+class AuditSink:
+    # События аудита копятся в памяти и пишутся пачкой из фонового потока:
+    # запрос не ждёт отдельного коммита ради строчки в журнале.
+    # Время события фиксируется при добавлении, а не при записи
+    def __init__(self, session_factory, batch_size: int, interval: float, max_pending: int):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        user_id: int,
+        action: str,
+        details: Optional[str] = None,
+        filename: Optional[str] = None,
+        file_id: Optional[int] = None,
+        payload: Optional[Dict] = None,
+    ):
+        row = {
+            "user_id": user_id,
+            "action": action,
+            "details": details,
+            "filename": filename,
+            "file_id": file_id,
+            "payload": payload,
+            "created_at": get_msk_time(),
+        }
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._events.append(row)
+            full = len(self._events) >= self.batch_size
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stop,), name="audit-sink", daemon=True
+                )
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._events)
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            count = len(events)
+            if not count:
+                return 0
+            db = self.session_factory()
+            try:
+                EventRepository(db).add_many(events)
+            except Exception as e:
+                db.rollback()
+                self.dropped += count
+                print(f"⚠️ Не удалось записать {count} событий аудита: {e}")
+                return 0
+            finally:
+                db.close()
+            return count
+
+    def shutdown(self):
+        # Остановка потока и запись всего, что осталось в буфере
+        with self._lock:
+            thread, stop = self._thread, self._stop
+            self._thread = self._stop = None
+        if thread is not None:
+            stop.set()
+            self._wakeup.set()
+            thread.join()
+        self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+# Пишет через синхронный движок, в одном соединении его пула
+audit_sink = AuditSink(
+    SessionLocal,
+    settings.AUDIT_FLUSH_BATCH_SIZE,
+    settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    settings.AUDIT_MAX_PENDING,
+)
@@ -6,7 +6,71 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Генерация карточек
+    QA_MODEL_NAME: str = "iarfmoose/t5-base-question-generator"
+    QA_PASSAGE_MAX_CHARS: int = 1200  # размер фрагмента текста, подаваемого в модель
+    QA_CARDS_PER_PASSAGE: int = 2
+    QA_BATCH_SIZE: int = 8  # сколько фрагментов уходит в модель за один проход
+    QA_BATCH_MAX_WAIT_MS: int = 20  # сколько ждать добора пачки
+    GENERATION_CACHE_MAX_ENTRIES: int = 1000
+    PROCESSING_SPILL_THRESHOLD_BYTES: int = 8 * 1024 * 1024  # PDF крупнее обрабатываются с диска
+
+    # Очередь обработки и воркеры
+    JOB_LEASE_SECONDS: int = 300
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 0.5  # как часто воркер пишет прогресс внутри одного этапа
+    JOB_EVENTS_POLL_SECONDS: float = 0.5  # как часто поток событий перечитывает задачу
+    JOB_EVENTS_HEARTBEAT_SECONDS: float = 15.0  # комментарий-пинг, чтобы прокси не рвали соединение
+    WORKER_PROCESSES: int = 0  # 0 — по числу ядер
+    WORKER_THREADS: int = 2  # задач одновременно в одном процессе (делят батчер модели)
+    WORKER_METRICS_PORT: int = 0  # /metrics процессов воркера: порт, порт+1, ...; 0 — выключено
+
+    # Метрики API (/metrics)
+    METRICS_ENABLED: bool = True
+    METRICS_QUEUE_DEPTH_TTL_SECONDS: float = 5.0  # глубина очереди считается в БД не чаще
+
+    # Бюджет SQL-запросов на HTTP-запрос (@query_budget у обработчика)
+    QUERY_BUDGET_MODE: str = "warn"  # warn — в лог, raise — исключение (тесты), off
+    QUERY_REPEAT_LIMIT: int = 3  # один и тот же запрос чаще — похоже на N+1
+
+    # Пулы соединений с БД: API (асинхронный движок) и воркеры обработки (синхронный) — раздельно
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # сколько ждать свободное соединение, потом ошибка
+    DB_POOL_RECYCLE: int = 1800  # пересоздавать соединения старше, сек
+    DB_POOL_PRE_PING: bool = True
+    WORKER_DB_POOL_SIZE: int = 5  # потоки воркера + продление аренды
+    WORKER_DB_MAX_OVERFLOW: int = 5
+    AUDIT_FLUSH_BATCH_SIZE: int = 200  # столько событий аудита — и пишем, не дожидаясь интервала
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_MAX_PENDING: int = 10000  # сверх этого события отбрасываются (БД недоступна)
+    EVENT_RETENTION_MONTHS: int = 12  # секции журнала событий старше удаляются целиком
+    EVENT_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0  # как часто воркер создаёт и удаляет секции
+
+    # Хэширование паролей (Argon2)
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400  # КиБ
+    ARGON2_PARALLELISM: int = 8
+    PASSWORD_HASH_WORKERS: int = 0  # потоков хэширования; 0 — по числу ядер
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # сверх этого новые логины получают 503
+
+    # Словарь (dictionaryapi.dev)
+    DICTIONARY_API_URL: str = "https://api.dictionaryapi.dev/api/v2/entries/en"
+    DICTIONARY_TIMEOUT_SECONDS: float = 5.0
+    DICTIONARY_MAX_CONNECTIONS: int = 20
+    DICTIONARY_CACHE_TTL_SECONDS: float = 24 * 3600
+    DICTIONARY_NEGATIVE_TTL_SECONDS: float = 3600  # сколько помнить, что слова нет
+    DICTIONARY_CACHE_MAX_ENTRIES: int = 10000
+    DICTIONARY_BATCH_MAX_WORDS: int = 50
+    DICTIONARY_BATCH_CONCURRENCY: int = 5  # одновременных запросов к API из одного batch
+
+    # Кэш пользователей для get_current_user
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_VERSION_CHECK_SECONDS: float = 5.0  # как часто сверяться с версией в БД (изменения из других процессов)
+
     class Config:
         env_file = "."
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    # Счётчики пула с момента старта процесса
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.waits = 0  # выдач, которым пришлось ждать освободившееся соединение
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0  # так и не дождались (TimeoutError)
+        self._lock = threading.Lock()
+
+    def record(self, waited: bool, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),  # SQLAlchemy отсчитывает overflow от -size
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+                "timeouts": self.timeouts,
+            }
+
+
+class InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def _do_get(self):
+        # Ждать придётся, если свободных соединений нет и overflow исчерпан
+        waited = self._max_overflow > -1 and self._overflow >= self._max_overflow and self.checkedin() == 0
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(True, time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(waited, time.perf_counter() - started)
+        return conn
+
+
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+def instrumented_pool_class(name: str, is_async: bool = False):
+    # Счётчики живут в атрибуте класса, поэтому переживают pool.recreate() при dispose()
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    stats = POOL_STATS.setdefault(name, PoolStats(name))
+    return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"stats": stats})
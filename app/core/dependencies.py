@@ -1,19 +1,19 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.repositories.user_repository import UserRepository
+from app.database import get_async_db, run_db, sync_session
 from app.core.security import decode_token
-from app.models import User, UserRole
+from app.core.user_cache import UserPrincipal, user_cache
+from app.models import UserRole
 
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,7 +27,8 @@ def get_current_user(
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = UserRepository(db).get_by_id(int(user_id))
+    # Обычно берётся из кэша процесса, без запроса в БД
+    user = await run_db(db, user_cache.get, sync_session(db), int(user_id))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -36,7 +37,7 @@ def get_current_user(
 def require_role(role: str | UserRole):
     required_role = UserRole(role) if isinstance(role, str) else role
 
-    def dependency(current_user: User = Depends(get_current_user)):
+    async def dependency(current_user: UserPrincipal = Depends(get_current_user)):
         if current_user.role != required_role:
             raise HTTPException(status_code=403, detail="Недостаточно прав")
         return current_user
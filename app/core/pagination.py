@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+NEXT = "next"
+PREV = "prev"
+
+
+def encode_cursor(values: Sequence[Any], direction: str = NEXT) -> str:
+    payload = {
+        "d": direction,
+        "k": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_value(value: Any, column) -> Any:
+    # Курсор приходит от клиента: значение должно совпадать по типу со столбцом,
+    # иначе сравнение упадёт в БД (500) вместо ответа 400
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool):
+        raise ValueError
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise ValueError
+    return value
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple[List[Any], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction = payload["d"]
+        values = payload["k"]
+        if direction not in (NEXT, PREV) or not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_cursor_value(v, col) for v, col in zip(values, columns)], direction
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_condition(columns: Sequence, values: Sequence[Any], descending: bool):
+    # (a, b) > (x, y) в виде a > x OR (a = x AND b > y): так условие
+    # понимают все диалекты и планировщик использует составной индекс
+    clauses = []
+    for i, (col, value) in enumerate(zip(columns, values)):
+        cmp = col < value if descending else col > value
+        clauses.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], cmp))
+    return or_(*clauses)
+
+
+def offset_page(
+    query: Query,
+    columns: Sequence,
+    limit: int,
+    offset: int,
+    descending: bool = False,
+) -> Tuple[list, Optional[str]]:
+    # Устаревший режим page/skip для старых клиентов: тот же порядок, что у
+    # keyset_page, и курсор следующей страницы, чтобы можно было перейти на него
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.offset(offset).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor([getattr(rows[-1], col.key) for col in columns], NEXT)
+    return rows, next_cursor
+
+
+def keyset_page(
+    query: Query,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Tuple[list, Optional[str], Optional[str]]:
+    # Страница по ключу (columns), последний столбец — уникальный id.
+    # Стоимость не зависит от глубины: OFFSET не используется
+    direction = NEXT
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        # Назад идём в обратном порядке сортировки, потом разворачиваем
+        query = query.filter(keyset_condition(columns, values, descending if direction == NEXT else not descending))
+
+    backwards = direction == PREV
+    reverse = descending != backwards
+    query = query.order_by(*[c.desc() if reverse else c.asc() for c in columns])
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def key(row):
+        return [getattr(row, col.key) for col in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key(rows[-1]), NEXT)
+        if cursor and (has_more or not backwards):
+            prev_cursor = encode_cursor(key(rows[0]), PREV)
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,112 @@
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import RequestStats, current_request
+
+# Бюджет SQL-запросов на HTTP-запрос и поиск N+1: одинаковый по форме запрос,
+# выполненный много раз за один HTTP-запрос, почти всегда — запрос в цикле.
+# В проде — предупреждение в лог, в тестах (QUERY_BUDGET_MODE=raise) — исключение
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+\b")
+# Списки параметров IN (?, ?, ?) и строки многострочного VALUES разной длины
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(max_queries: Optional[int] = None, repeats: bool = True):
+    # Объявление бюджета у обработчика; декоратор ставится под @router.get(...).
+    # max_queries=None — без предела по числу; repeats=False — не искать N+1
+    # (для потоков, которые по таймеру перечитывают одно и то же)
+    def decorator(fn):
+        fn.query_budget = max_queries
+        fn.query_repeats = repeats
+        return fn
+
+    return decorator
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PARAM_LIST.sub("(?)", shape)
+    shape = _VALUES_ROWS.sub(r"\1", shape)
+    return _NUMBER.sub("N", shape)
+
+
+def repeated_statements(stats: RequestStats, limit: int) -> Dict[str, int]:
+    shapes: Dict[str, int] = {}
+    for statement, count in stats.statements.items():
+        shape = statement_shape(statement)
+        shapes[shape] = shapes.get(shape, 0) + count
+    return {shape: count for shape, count in shapes.items() if count > limit}
+
+
+def check_budget(label: str, stats: RequestStats, max_queries: Optional[int], repeats: bool = True):
+    mode = settings.QUERY_BUDGET_MODE
+    if mode == "off":
+        return
+    problems: List[str] = []
+    if max_queries is not None and stats.queries > max_queries:
+        problems.append(f"{label}: {stats.queries} SQL-запросов при бюджете {max_queries}")
+    if repeats:
+        for shape, count in repeated_statements(stats, settings.QUERY_REPEAT_LIMIT).items():
+            problems.append(f"{label}: запрос повторён {count} раз (N+1?): {shape[:300]}")
+    if not problems:
+        return
+    if mode == "raise":
+        raise QueryBudgetExceeded("\n".join(problems))
+    for problem in problems:
+        print(f"⚠️ {problem}")
+
+
+@contextmanager
+def track_queries(label: str, max_queries: Optional[int] = None, repeats: bool = True) -> Iterator[RequestStats]:
+    # То же для кода вне HTTP-запроса (воркеры, скрипты, тесты)
+    stats = RequestStats()
+    token = current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request.reset(token)
+    check_budget(label, stats, max_queries, repeats)
+
+
+class QueryBudgetMiddleware:
+    # Проверка после ответа: бюджет берётся у обработчика найденного маршрута.
+    # Статистику запроса ведёт MetricsMiddleware; без неё middleware заводит свою
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.QUERY_BUDGET_MODE == "off":
+            await self.app(scope, receive, send)
+            return
+
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                current_request.reset(token)
+
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        if endpoint is None:
+            return
+        check_budget(
+            f"{scope['method']} {scope['route'].path}",
+            stats,
+            getattr(endpoint, "query_budget", None),
+            getattr(endpoint, "query_repeats", True),
+        )
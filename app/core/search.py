@@ -0,0 +1,24 @@
+import re
+
+LIKE_ESCAPE = "\\"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def contains_pattern(text: str) -> str:
+    # Подстрока для LIKE/ILIKE: %, _ и \ из пользовательского ввода ищутся буквально
+    escaped = (
+        text.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+    return f"%{escaped}%"
+
+
+def search_terms(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def fts5_query(text: str) -> str:
+    # Каждое слово в кавычках: синтаксис FTS5 (AND, NEAR, *, ...) из ввода не интерпретируется
+    return " ".join(f'"{term}"' for term in search_terms(text))
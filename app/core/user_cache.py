@@ -0,0 +1,87 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import User, UserRole
+from app.repositories.cache_version_repository import CacheVersionRepository
+from app.repositories.user_repository import UserRepository
+
+USERS_CACHE_VERSION = "users"
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    # Всё, что эндпоинтам нужно о текущем пользователе; не привязан к сессии БД
+    user_id: int
+    email: str
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(user_id=user.user_id, email=user.email, role=UserRole(user.role))
+
+
+class UserPrincipalCache:
+    def __init__(self, maxsize: int, ttl: float, version_check_seconds: float):
+        self._cache = TTLCache(maxsize, ttl)
+        self.version_check_seconds = version_check_seconds
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        # Растёт при каждой инвалидации: запрос, прочитавший пользователя
+        # до неё, не кладёт в кэш устаревшие данные
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _sync_version(self, db: Session):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_seconds:
+            return
+        self._checked_at = now
+        version = CacheVersionRepository(db).get(USERS_CACHE_VERSION)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._generation += 1
+                self._cache.clear()
+
+    def get(self, db: Session, user_id: int) -> Optional[UserPrincipal]:
+        self._sync_version(db)
+        principal = self._cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        generation = self._generation
+        user = UserRepository(db).get_by_id(user_id)
+        if user is None:
+            return None
+        principal = UserPrincipal.from_user(user)
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(user_id, principal)
+        return principal
+
+    def invalidate(self, db: Session, user_id: int):
+        with self._lock:
+            self._generation += 1
+            self._cache.pop(user_id)
+        # Другие процессы увидят новую версию при следующей сверке
+        CacheVersionRepository(db).bump(USERS_CACHE_VERSION)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._version = None
+            self._checked_at = 0.0
+            self._cache.clear()
+
+
+user_cache = UserPrincipalCache(
+    settings.USER_CACHE_MAX_ENTRIES,
+    settings.USER_CACHE_TTL_SECONDS,
+    settings.USER_CACHE_VERSION_CHECK_SECONDS,
+)
@@ -1,18 +1,61 @@
 import os
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db_pool import POOL_STATS, instrumented_pool_class
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
+# Из одного DATABASE_URL строятся оба движка: асинхронный для API
+# и синхронный для воркеров, миграций и скриптов
+SYNC_DRIVERS = {"postgresql": "postgresql+psycopg2", "sqlite": "sqlite"}
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def sync_database_url(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=SYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+
+def async_database_url(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+
+def pool_options(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 
+# Синхронный движок нужен в основном воркерам обработки: у них свой пул
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args
+    sync_database_url(SQLALCHEMY_DATABASE_URL),
+    connect_args=connect_args,
+    poolclass=instrumented_pool_class("worker"),
+    **pool_options(settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=instrumented_pool_class("api", is_async=True),
+    **pool_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 class Base(DeclarativeBase):
     pass
 
@@ -21,4 +64,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def pool_status() -> dict:
+    return {
+        "api": POOL_STATS["api"].snapshot(async_engine.sync_engine.pool),
+        "worker": POOL_STATS["worker"].snapshot(engine.pool),
+    }
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def sync_session(db: Session | AsyncSession) -> Session:
+    # Репозитории работают с синхронным Session; у AsyncSession это его sync_session
+    return db.sync_session if isinstance(db, AsyncSession) else db
+
+
+async def run_db(db: Session | AsyncSession, fn, *args, **kwargs):
+    # Синхронный код репозиториев из async-обработчика: с AsyncSession он
+    # выполняется через run_sync в том же event loop (I/O асинхронное, поток
+    # не занимается), с обычным Session — в пуле потоков Starlette
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda _: fn(*args, **kwargs))
+    return await run_in_threadpool(fn, *args, **kwargs)
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.core.dependencies import get_db, require_role
+from app.core.dependencies import get_async_db, require_role
+from app.core.query_budget import query_budget
+from app.core.search import LIKE_ESCAPE, contains_pattern
+from app.database import pool_status
 from app.models import User, UserRole
 from app.schemas.admin import RoleUpdate
 from app.services.admin_service import AdminService
@@ -9,22 +13,23 @@ from app.services.admin_service import AdminService
 router = APIRouter()
 
 @router.get("/users")
+@query_budget(4)
 async def list_users(
     search: Optional[str] = Query(None),
     role: Optional[str] = Query(None),
     sort: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.admin)),
 ):
-    query = db.query(User)
+    query = select(User)
 
     if search:
-        query = query.filter(User.email.ilike(f"%{search}%"))
+        query = query.where(User.email.ilike(contains_pattern(search), escape=LIKE_ESCAPE))
 
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
 
     if sort == "email_asc":
         query = query.order_by(User.email.asc())
@@ -39,8 +44,8 @@ async def list_users(
     elif sort == "role_desc":
         query = query.order_by(User.role.desc())
 
-    total = query.count()
-    users = query.offset((page - 1) * limit).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    users = (await db.scalars(query.offset((page - 1) * limit).limit(limit))).all()
 
     return {
         "success": True,
@@ -51,11 +56,30 @@ async def list_users(
     }
 
 @router.put("/users/{user_id}/role")
-def change_user_role(
+@query_budget(6)
+async def change_user_role(
     user_id: int,
     payload: RoleUpdate,
     current_user: User = Depends(require_role(UserRole.admin)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     service = AdminService(db)
-    return service.change_user_role(current_user, user_id, payload.role)
\ No newline at end of file
+    return await service.run_db(service.change_user_role, current_user, user_id, payload.role)
+
+
+@router.delete("/generation-cache")
+@query_budget(3)
+async def clear_generation_cache(
+    current_user: User = Depends(require_role(UserRole.admin)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = AdminService(db)
+    return await service.run_db(service.clear_generation_cache, current_user)
+
+
+@router.get("/db-pool")
+@query_budget(2)
+async def get_db_pool_status(
+    current_user: User = Depends(require_role(UserRole.admin)),
+):
+    return {"success": True, "pools": pool_status()}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Response, Request, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.auth import UserCreate, TokenResponse
 from app.services.auth_service import AuthService
-from app.core.dependencies import get_db
+from app.core.dependencies import get_async_db
+from app.core.query_budget import query_budget
 from app.core.config import settings
 
 router = APIRouter()
@@ -21,39 +22,43 @@ def set_refresh_cookie(response: Response, refresh_token: str):
 
 
 @router.post("/register", response_model=TokenResponse)
-def register(data: UserCreate, response: Response, db: Session = Depends(get_db)):
+@query_budget(5)
+async def register(data: UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     service = AuthService(db)
-    tokens = service.register(data.email, data.password)
+    tokens = await service.register(data.email, data.password)
     set_refresh_cookie(response, tokens["refresh_token"])
     return TokenResponse(**tokens)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(data: UserCreate, response: Response, db: Session = Depends(get_db)):
+@query_budget(3)
+async def login(data: UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     service = AuthService(db)
-    tokens = service.login(data.email, data.password)
+    tokens = await service.login(data.email, data.password)
     set_refresh_cookie(response, tokens["refresh_token"])
     return TokenResponse(**tokens)
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh(request: Request, response: Response, db: Session = Depends(get_db)):
+@query_budget(6)
+async def refresh(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     refresh_token = request.cookies.get("refresh_token")
     if not refresh_token:
         raise HTTPException(status_code=401, detail="Refresh token missing")
 
     service = AuthService(db)
-    tokens = service.refresh(refresh_token)
+    tokens = await service.run_db(service.refresh, refresh_token)
     set_refresh_cookie(response, tokens["refresh_token"])
     return TokenResponse(**tokens)
 
 
 @router.post("/logout")
-def logout(request: Request, response: Response, db: Session = Depends(get_db)):
+@query_budget(2)
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     refresh_token = request.cookies.get("refresh_token")
     if refresh_token:
         service = AuthService(db)
-        service.logout(refresh_token)
+        await service.run_db(service.logout, refresh_token)
 
     response.delete_cookie(
         key="refresh_token",
@@ -1,27 +1,28 @@
-from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, Query, Request
+from fastapi import APIRouter, Depends, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_current_user
+from app.core.dependencies import get_async_db, get_current_user
+from app.core.config import settings
+from app.core.query_budget import query_budget
 from app.schemas.pdf import (
-    PDFUploadResponse, PDFProcessingResponse, CardsResponse, DeleteResponse, HistoryResponse
+    PDFUploadResponse, PDFProcessingResponse, CardsResponse, DeleteResponse, HistoryResponse,
+    JobStatusResponse, CardSearchResponse,
 )
 from app.models import User, ProcessingStatus
 from app.services.pdf_service import PDFService
-from app.services.qa_generator_service import QAGeneratorService
 
 router = APIRouter()
 
 
-def get_pdf_service(
-        request: Request,
-        db: Session = Depends(get_db)
-) -> PDFService:
-    qa_service: QAGeneratorService = request.app.state.qa_service
-    return PDFService(db, qa_service)
+async def get_pdf_service(db: AsyncSession = Depends(get_async_db)) -> PDFService:
+    # Генерация карточек идёт в воркерах (app.worker), API только ставит задачи
+    return PDFService(db)
 
 
 @router.post("/upload", response_model=PDFUploadResponse)
+@query_budget(6)
 async def upload_pdf(
         file: UploadFile = File(...),
         service: PDFService = Depends(get_pdf_service),
@@ -31,80 +32,119 @@ async def upload_pdf(
 
 
 @router.get("/list", response_model=dict)
-def list_pdfs(
-        page: int = Query(1, ge=1),
+@query_budget(4)
+async def list_pdfs(
+        cursor: Optional[str] = Query(None, max_length=512),
         limit: int = Query(10, ge=1, le=100),
         status: Optional[ProcessingStatus] = Query(None),
         search: Optional[str] = Query(None, max_length=100),
         sort: str = Query("created_at_desc", pattern="^(created_at_desc|created_at_asc|name_asc|name_desc)$"),
+        include_total: bool = Query(False),
+        page: Optional[int] = Query(None, ge=1, deprecated=True, description="Устарело: используйте cursor"),
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    return service.list_pdfs_filtered(
-        user=user, page=page, limit=limit,
-        status=status, search=search, sort=sort
+    return await service.run_db(
+        service.list_pdfs_filtered,
+        user=user, cursor=cursor, limit=limit,
+        status=status, search=search, sort=sort,
+        include_total=include_total, page=page,
     )
 
 
+# Лента читает секции журнала по одной, пока не наберёт limit
 @router.get("/history", response_model=HistoryResponse)
-def get_history(
+@query_budget(3 + settings.EVENT_RETENTION_MONTHS)
+async def get_history(
         limit: int = Query(50, ge=1, le=200),
+        before: Optional[str] = Query(None, max_length=512),
+        service: PDFService = Depends(get_pdf_service),
+        user: User = Depends(get_current_user)
+):
+    return await service.run_db(service.get_history, user, limit, before)
+
+
+@router.get("/cards/search", response_model=CardSearchResponse)
+@query_budget(3)
+async def search_cards(
+        q: str = Query(..., min_length=1, max_length=200),
+        file_id: Optional[int] = Query(None),
+        cursor: Optional[str] = Query(None, max_length=512),
+        limit: int = Query(10, ge=1, le=100),
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    return service.get_history(user, limit)
+    return await service.run_db(service.search_cards, user, q, file_id, cursor, limit)
 
 
 @router.get("/cards/{file_id}", response_model=CardsResponse)
-def get_cards(
+@query_budget(4)
+async def get_cards(
         file_id: int,
-        skip: int = Query(0, ge=0),
+        cursor: Optional[str] = Query(None, max_length=512),
         limit: int = Query(10, ge=1, le=100),
+        skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Устарело: используйте cursor"),
+        service: PDFService = Depends(get_pdf_service),
+        user: User = Depends(get_current_user)
+):
+    return await service.run_db(service.get_cards, file_id, user, cursor, limit, skip)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+@query_budget(3)
+async def get_job(
+        job_id: int,
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    return service.get_cards(file_id, user, skip, limit)
+    return await service.run_db(service.get_job, job_id, user)
 
 
 @router.post("/{file_id}/process", response_model=PDFProcessingResponse)
-def start_processing(
+@query_budget(10)
+async def start_processing(
         file_id: int,
-        background_tasks: BackgroundTasks,
         max_cards: int = Query(20, ge=1, le=100),
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    pdf_file = service.start_processing(file_id, user)
-
-    background_tasks.add_task(
-        service.process_pdf_sync,
-        file_id,
-        pdf_file.file_key,
-        pdf_file.file_name,
-        user.user_id,
-        max_cards
-    )
+    return await service.run_db(service.start_processing, file_id, user, max_cards)
 
-    return {
-        "success": True,
-        "status": "processing",
-        "message": "Обработка запущена"
-    }
+
+# Поток перечитывает задачу по таймеру: повтор одного запроса здесь не N+1
+@router.get("/{file_id}/events")
+@query_budget(repeats=False)
+async def progress_events(
+        file_id: int,
+        request: Request,
+        service: PDFService = Depends(get_pdf_service),
+        user: User = Depends(get_current_user)
+):
+    # Проверка владельца до начала потока, чтобы 404 ушёл обычным ответом
+    progress = await service.run_db(service.get_progress, file_id, user)
+    await service.session.close()
+    return StreamingResponse(
+        service.progress_events(file_id, user, progress, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{file_id}/download")
-def download_file(
+@query_budget(3)
+async def download_file(
         file_id: int,
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    return service.get_download_url(file_id, user)
+    return await service.run_db(service.get_download_url, file_id, user)
 
 
 @router.delete("/{file_id}", response_model=DeleteResponse)
-def delete_pdf(
+@query_budget(7)
+async def delete_pdf(
         file_id: int,
         service: PDFService = Depends(get_pdf_service),
         user: User = Depends(get_current_user)
 ):
-    return service.delete_pdf(file_id, user)
\ No newline at end of file
+    return await service.delete_pdf(file_id, user)
\ No newline at end of file
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.profile import ChangePasswordRequest, ChangeEmailRequest, ChangeEmailResponse
 from app.services.user_service import UserService
-from app.core.dependencies import get_db, get_current_user
+from app.core.dependencies import get_async_db, get_current_user
+from app.core.query_budget import query_budget
 from app.models import User
 
 router = APIRouter()
 
 @router.get("/me")
-def get_profile(current_user: User = Depends(get_current_user)):
+@query_budget(2)
+async def get_profile(current_user: User = Depends(get_current_user)):
     return {
         "user_id": current_user.user_id,
         "email": current_user.email,
@@ -16,23 +18,25 @@ def get_profile(current_user: User = Depends(get_current_user)):
     }
 
 @router.post("/change-password")
-def change_password(
+@query_budget(7)
+async def change_password(
     request: ChangePasswordRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     service = UserService(db)
-    service.change_password(current_user.user_id, request.current_password, request.new_password)
+    await service.change_password(current_user.user_id, request.current_password, request.new_password)
     return {"success": True, "message": "✅ Пароль успешно изменён"}
 
 @router.post("/change-email", response_model=ChangeEmailResponse)
-def change_email(
+@query_budget(7)
+async def change_email(
     request: ChangeEmailRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     service = UserService(db)
-    new_email = service.change_email(current_user.user_id, request.password, request.new_email)
+    new_email = await service.change_email(current_user.user_id, request.password, request.new_email)
     return {
         "success": True,
         "message": "✅ Email успешно изменён",
@@ -1,30 +1,38 @@
 from contextlib import asynccontextmanager
-import asyncio
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.minio_client import ensure_bucket, MINIO_BUCKET_PDF
-from app.services.qa_generator_service import QAGeneratorService
+from app.core.audit import audit_sink
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.query_budget import QueryBudgetMiddleware, query_budget
+from app.core.security import hashing_pool
+from app.database import async_engine, get_async_db, pool_status, run_db, sync_session
+from app.repositories.job_repository import JobRepository
+from app.services.dictionary_service import close_client
+from app.minio_client import storage, MINIO_BUCKET_PDF
 from app.endpoints import auth, profile, pdf, admin
 from app.routers import dictionary, seo, landing
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Результат запоминается: загрузки больше не проверяют бакет перед каждым put
     try:
-        ensure_bucket(MINIO_BUCKET_PDF)
+        await storage.ensure_bucket_async(MINIO_BUCKET_PDF)
     except Exception as e:
         print(f"⚠️ MinIO недоступен: {e}")
 
-    qa = QAGeneratorService()
-    try:
-        await asyncio.to_thread(qa._initialize)
-    except Exception as e:
-        print(f"⚠️ QAGenerator не инициализирован: {e}")
-
-    app.state.qa_service = qa
+    # Модель генерации загружается только в воркерах (python -m app.worker)
     yield
+    storage.shutdown()
+    hashing_pool.shutdown()
+    audit_sink.shutdown()
+    await async_engine.dispose()
+    await close_client()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -44,6 +52,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Порядок: последний добавленный — внешний; бюджет проверяется по статистике метрик
+app.add_middleware(QueryBudgetMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
 app.include_router(pdf.router, prefix="/api/pdf", tags=["pdf"])
@@ -54,10 +67,43 @@ app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/")
+@query_budget(0)
 def root():
     return {"message": "API работает"}
 
 
 @app.get("/health")
+@query_budget(0)
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+QUEUE_DEPTH = registry.gauge("processing_queue_depth", "Processing jobs waiting or running", ("status",))
+registry.gauge(
+    "db_pool_connections",
+    "Database pool connections by pool and state",
+    ("pool", "state"),
+    callback=lambda: {
+        (name, state): stats[state]
+        for name, stats in pool_status().items()
+        for state in ("checked_out", "checked_in", "overflow")
+    },
+)
+# Опрос раз в 15-30 секунд с нескольких реплик не должен каждый раз считать очередь в БД
+_queue_depth = TTLCache(maxsize=1, ttl=settings.METRICS_QUEUE_DEPTH_TTL_SECONDS)
+
+
+@app.get("/metrics", include_in_schema=False)
+@query_budget(1)
+async def metrics(db: AsyncSession = Depends(get_async_db)):
+    depth = _queue_depth.get("jobs")
+    if depth is None:
+        try:
+            depth = await run_db(db, lambda: JobRepository(sync_session(db)).count_active())
+        except Exception as e:
+            print(f"⚠️ Глубина очереди не посчитана: {e}")
+            depth = {}
+        _queue_depth.set("jobs", depth)
+    for status, count in depth.items():
+        QUEUE_DEPTH.set(count, status)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,53 +1,178 @@
+import asyncio
+import functools
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 from fastapi import HTTPException
 import uuid
 import logging
-from io import BytesIO
 from datetime import timedelta
 
+from app.core.metrics import StorageTimer
+
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
 MINIO_BUCKET_PDF = os.getenv("MINIO_BUCKET_PDF", "pdf-files")
 MINIO_SECURE = os.getenv("MINIO_SECURE", "false").lower() == "true"
+# Регион задан явно, чтобы клиент не запрашивал его у сервера (в т.ч. при подписи ссылок)
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+# Размер части multipart-загрузки (минимум для S3 — 5 МБ); больше в памяти на загрузку не держится
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", str(5 * 1024 * 1024)))
+# Сколько вызовов MinIO выполняется одновременно; столько же keep-alive соединений в пуле
+MINIO_MAX_WORKERS = int(os.getenv("MINIO_MAX_WORKERS", "16"))
+MINIO_TIMEOUT = float(os.getenv("MINIO_TIMEOUT", "30"))
+
+http_client = urllib3.PoolManager(
+    timeout=urllib3.Timeout(connect=MINIO_TIMEOUT, read=MINIO_TIMEOUT),
+    maxsize=MINIO_MAX_WORKERS,
+    block=True,
+    cert_reqs="CERT_REQUIRED",
+    ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+    retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+)
 
 client = Minio(
     MINIO_ENDPOINT,
     access_key=MINIO_ACCESS_KEY,
     secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
+    secure=MINIO_SECURE,
+    region=MINIO_REGION,
+    http_client=http_client,
 )
 
 
+class MinioStorage:
+    # Асинхронный фасад над блокирующим клиентом minio: вызовы уходят в
+    # ограниченный пул потоков, а существование бакета проверяется один раз
+    def __init__(self, minio_client: Minio, max_workers: int = MINIO_MAX_WORKERS):
+        self.client = minio_client
+        self.max_workers = max_workers
+        self._executor = None
+        self._known_buckets: set[str] = set()
+        self._bucket_lock = threading.Lock()
+
+    async def _run(self, operation: Optional[str], fn, *args, **kwargs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="minio")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._timed, operation, fn, *args, **kwargs))
+
+    @staticmethod
+    def _timed(operation: Optional[str], fn, *args, **kwargs):
+        # Время самого вызова, без ожидания свободного потока в пуле
+        if operation is None:
+            return fn(*args, **kwargs)
+        with StorageTimer(operation):
+            return fn(*args, **kwargs)
+
+    def ensure_bucket(self, bucket: str):
+        if bucket in self._known_buckets:
+            return
+        with self._bucket_lock:
+            if bucket in self._known_buckets:
+                return
+            with StorageTimer("bucket_exists"):
+                exists = self.client.bucket_exists(bucket)
+            if not exists:
+                with StorageTimer("make_bucket"):
+                    self.client.make_bucket(bucket)
+                logging.info(f"Bucket '{bucket}' created")
+            self._known_buckets.add(bucket)
+
+    async def ensure_bucket_async(self, bucket: str):
+        if bucket not in self._known_buckets:
+            await self._run(None, self.ensure_bucket, bucket)
+
+    async def put(self, bucket: str, object_name: str, data: BinaryIO, length: int, content_type: str):
+        await self.ensure_bucket_async(bucket)
+        # put_object сам режет поток на части по MINIO_PART_SIZE
+        await self._run(
+            "put",
+            self.client.put_object,
+            bucket_name=bucket,
+            object_name=object_name,
+            data=data,
+            length=length,
+            content_type=content_type,
+            part_size=MINIO_PART_SIZE,
+        )
+
+    async def remove(self, bucket: str, object_name: str):
+        await self._run("remove", self.client.remove_object, bucket, object_name)
+
+    @contextmanager
+    def fetch_object(self, bucket: str, object_name: str, spill_threshold: int) -> Iterator[Union[bytes, str]]:
+        # Один GET без stat_object: небольшие объекты отдаются байтами из памяти,
+        # объекты больше spill_threshold пишутся во временный файл и отдаются путём.
+        # Ответ закрывается до yield, чтобы соединение не висело во время обработки
+        spilled = None
+        # Время get — вместе с чтением тела: до конца чтения соединение занято
+        with StorageTimer("get"):
+            response = self.client.get_object(bucket, object_name)
+            try:
+                size = int(response.headers.get("Content-Length") or 0)
+                if size <= spill_threshold:
+                    data = response.read()
+                else:
+                    spilled = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                    with spilled:
+                        for chunk in response.stream(1024 * 1024):
+                            spilled.write(chunk)
+            except BaseException:
+                if spilled is not None:
+                    os.unlink(spilled.name)
+                raise
+            finally:
+                response.close()
+                response.release_conn()
+
+        if spilled is None:
+            yield data
+            return
+        try:
+            yield spilled.name
+        finally:
+            os.unlink(spilled.name)
+
+    def presigned_get_url(self, bucket: str, object_name: str, expires: int) -> str:
+        # С известным регионом подпись считается локально, без запроса к MinIO
+        with StorageTimer("presign"):
+            return self.client.presigned_get_object(bucket, object_name, expires=timedelta(seconds=expires))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+storage = MinioStorage(client)
+
+
 def ensure_bucket(bucket: str):
-    if not client.bucket_exists(bucket):
-        client.make_bucket(bucket)
-        logging.info(f"Bucket '{bucket}' created")
+    storage.ensure_bucket(bucket)
 
-def delete_file_from_minio(bucket: str, file_key: str):
+async def delete_file_from_minio(bucket: str, file_key: str):
     try:
-        client.remove_object(bucket, file_key)
+        await storage.remove(bucket, file_key)
     except S3Error as e:
         logging.error(f"MinIO delete error: {e}")
 
 def generate_presigned_url(bucket: str, file_key: str, expires: int = 3600) -> str:
     try:
-        print(f"🔄 Генерация pre-signed URL для {bucket}/{file_key}")
-        url = client.presigned_get_object(
-            bucket,
-            file_key,
-            expires=timedelta(seconds=expires)  # преобразуем int в timedelta
-        )
-        print(f"✅ Успешно: {url[:100]}...")
-        return url
+        return storage.presigned_get_url(bucket, file_key, expires)
     except S3Error as e:
         logging.error(f"MinIO presigned URL error: {e}")
-        print(f"❌ S3Error: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate download link")
     except Exception as e:
-        print(f"❌ Неизвестная ошибка: {repr(e)}")
+        logging.error(f"MinIO presigned URL error: {e!r}")
         raise HTTPException(status_code=500, detail="Failed to generate download link")
 
 def generate_file_key(original_filename: str) -> str:
@@ -55,22 +180,15 @@ def generate_file_key(original_filename: str) -> str:
     return f"{uuid.uuid4().hex}{ext}"
 
 async def upload_file_to_minio(
-    file_data: bytes,
+    data: BinaryIO,
+    length: int,
     bucket: str,
     object_name: str,
     content_type: str
 ) -> str:
-    ensure_bucket(bucket)
-    data_stream = BytesIO(file_data)
     try:
-        client.put_object(
-            bucket_name=bucket,
-            object_name=object_name,
-            data=data_stream,
-            length=len(file_data),
-            content_type=content_type
-        )
+        await storage.put(bucket, object_name, data, length, content_type)
         return object_name
     except S3Error as e:
         logging.error(f"MinIO upload error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to upload file to storage")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to upload file to storage")
@@ -3,8 +3,12 @@ from .models import User as User
 from .models import UserRole as UserRole
 from .models import PDFFile as PDFFile
 from .models import Flashcard as Flashcard
-from .models import ActionHistory as ActionHistory
 from .models import RefreshToken as RefreshToken
 from .models import ProcessingStatus as ProcessingStatus
 from .models import ActionType as ActionType
-from .models import ActionLog as ActionLog
\ No newline at end of file
+from .models import Event as Event
+from .models import ProcessingJob as ProcessingJob
+from .models import JobStatus as JobStatus
+from .models import PDFBlob as PDFBlob
+from .models import GenerationCacheEntry as GenerationCacheEntry
+from .models import CacheVersion as CacheVersion
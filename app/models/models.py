@@ -1,6 +1,6 @@
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Index, DDL, event, func, text
 import enum
 import uuid
 from sqlalchemy import JSON
@@ -24,12 +24,19 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     role = Column(Enum(UserRole), default=UserRole.user, nullable=False)
+
+    # Поиск подстроки (ILIKE '%...%') по email на Postgres
+    __table_args__ = (
+        Index(
+            "ix_users_email_trgm", "email",
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
 
     pdf_files = relationship("PDFFile", back_populates="user", cascade="all, delete-orphan")
     flashcards = relationship("Flashcard", back_populates="user", cascade="all, delete-orphan")
-    action_history = relationship("ActionHistory", back_populates="user", cascade="all, delete-orphan")
-    action_logs = relationship("ActionLog", back_populates="user", cascade="all, delete-orphan")
 
 class ProcessingStatus(str, enum.Enum):
     UPLOADED = "uploaded"
@@ -37,6 +44,12 @@ class ProcessingStatus(str, enum.Enum):
     PROCESSED = "processed"
     FAILED = "failed"
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class ActionType(str, enum.Enum):
     UPLOAD = "upload"
     DOWNLOAD = "download"
@@ -44,11 +57,22 @@ class ActionType(str, enum.Enum):
     EDIT = "edit"
     GENERATE_CARDS = "generate_cards"
 
+class PDFBlob(Base):
+    # Одинаковое содержимое хранится в бакете один раз; pdf_files ссылаются на него по хэшу
+    __tablename__ = "pdf_blobs"
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), unique=True, nullable=False)  # SHA-256 содержимого
+    file_key = Column(String(500), unique=True, nullable=False)  # ключ в MinIO
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)  # сколько pdf_files на него ссылается
+    created_at = Column(DateTime, default=get_msk_time)
+
 class PDFFile(Base):
     __tablename__ = "pdf_files"
     id = Column(Integer, primary_key=True)
     file_name = Column(String(255), nullable=False)  # оригинальное имя
-    file_key = Column(String(500), unique=True, nullable=False)  # ключ в MinIO (вместо file_path)
+    file_key = Column(String(500), nullable=False)  # ключ в MinIO, общий для файлов с одинаковым содержимым
+    content_hash = Column(String(64), index=True)  # pdf_blobs.content_hash; у старых записей пусто
     size = Column(Integer, nullable=False)  # размер в байтах
     mime_type = Column(String(100), nullable=False)  # application/pdf
     status = Column(Enum(ProcessingStatus), default=ProcessingStatus.UPLOADED, nullable=False)
@@ -56,28 +80,70 @@ class PDFFile(Base):
     is_deleted = Column(Boolean, default=False)
     created_at = Column(DateTime, default=get_msk_time)
     updated_at = Column(DateTime, default=get_msk_time, onupdate=get_msk_time)  # для сортировки
+    card_count = Column(Integer)  # счётчик карточек; NULL — ещё не посчитан (старые записи)
+
+    # Ключи курсорной пагинации списка файлов. Индексы частичные: удалённые
+    # файлы в список не попадают, а условие совпадает с фильтром ~is_deleted
+    __table_args__ = (
+        Index(
+            "ix_pdf_files_live_user_created_id", "user_id", "created_at", "id",
+            sqlite_where=text("is_deleted = 0"), postgresql_where=text("NOT is_deleted"),
+        ),
+        Index(
+            "ix_pdf_files_live_user_name_id", "user_id", "file_name", "id",
+            sqlite_where=text("is_deleted = 0"), postgresql_where=text("NOT is_deleted"),
+        ),
+        # Поиск подстроки (ILIKE '%...%') по имени файла на Postgres
+        Index(
+            "ix_pdf_files_file_name_trgm", "file_name",
+            postgresql_using="gin", postgresql_ops={"file_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     user = relationship("User", back_populates="pdf_files")
     flashcards = relationship("Flashcard", back_populates="pdf_file", cascade="all, delete-orphan")
-    action_logs = relationship("ActionLog", back_populates="pdf_file", cascade="all, delete-orphan")  # добавим позже
 
-class ActionLog(Base):
-    __tablename__ = "action_logs"
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False, index=True)
-    file_id = Column(Integer, ForeignKey('pdf_files.id'), nullable=False, index=True)
-    action = Column(Enum(ActionType), nullable=False)
-    details = Column(JSON, nullable=True)  # дополнительная информация
-    timestamp = Column(DateTime, default=get_msk_time)
+class Event(Base):
+    # Единый журнал действий, секционированный по месяцам. Строки лежат только
+    # в секциях events_YYYYMM (см. EventRepository): на Postgres это секции
+    # этой таблицы, на SQLite — отдельные таблицы той же структуры.
+    # Внешних ключей нет: журнал переживает удалённые файлы и пользователей
+    __tablename__ = "events"
+    # Ключ секционированной таблицы обязан включать created_at; id на Postgres
+    # выдаёт общая для всех секций последовательность (см. DDL ниже)
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime, primary_key=True, default=get_msk_time)
+    user_id = Column(Integer, nullable=False)
+    file_id = Column(Integer, nullable=True)
+    action = Column(String(50), nullable=False)
+    filename = Column(String(255))
+    details = Column(Text)  # текст для истории пользователя
+    payload = Column(JSON)  # данные для разбора
+
+    __table_args__ = (
+        Index("ix_events_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_events_file_created", "file_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    user = relationship("User", back_populates="action_logs")
-    pdf_file = relationship("PDFFile", back_populates="action_logs")
+event.listen(
+    Event.__table__, "before_create",
+    DDL("CREATE SEQUENCE IF NOT EXISTS events_id_seq").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Event.__table__, "after_create",
+    DDL("ALTER TABLE events ALTER COLUMN id SET DEFAULT nextval('events_id_seq')").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Event.__table__, "after_drop",
+    DDL("DROP SEQUENCE IF EXISTS events_id_seq").execute_if(dialect="postgresql"),
+)
 
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
     id = Column(Integer, primary_key=True)
-    pdf_file_id = Column(Integer, ForeignKey('pdf_files.id'), index=True)
+    pdf_file_id = Column(Integer, ForeignKey('pdf_files.id'))
     user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
@@ -87,20 +153,109 @@ class Flashcard(Base):
     is_deleted = Column(Boolean, default=False)
     created_at = Column(DateTime, default=get_msk_time)
 
+    __table_args__ = (
+        # Карточки файла его владельца по порядку id; покрывает и поиск по pdf_file_id
+        Index("ix_flashcards_pdf_user_id", "pdf_file_id", "user_id", "id"),
+    )
+
+    @staticmethod
+    def search_vector(question, answer, context):
+        # Одно выражение и для индекса, и для запроса — иначе Postgres индекс не возьмёт.
+        # Константы вписаны литералами: с bind-параметрами выражения не совпадут
+        document = func.coalesce(question, text("''"))
+        for column in (answer, context):
+            document = document.op("||")(text("' '")).op("||")(func.coalesce(column, text("''")))
+        return func.to_tsvector(text("'simple'"), document)
+
     pdf_file = relationship("PDFFile", back_populates="flashcards")
 
     user = relationship("User", back_populates="flashcards")
 
-class ActionHistory(Base):
-    __tablename__ = "action_history"
+
+Index(
+    "ix_flashcards_search",
+    Flashcard.search_vector(Flashcard.question, Flashcard.answer, Flashcard.context),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# На SQLite полнотекстовый поиск по карточкам идёт через внешнюю FTS5-таблицу,
+# которую триггеры держат в синхроне с flashcards
+FLASHCARDS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+        question, answer, context, content='flashcards', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, question, answer, context)
+        VALUES (new.id, new.question, new.answer, new.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, question, answer, context)
+        VALUES ('delete', old.id, old.question, old.answer, old.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        INSERT INTO flashcards_fts(flashcards_fts, rowid, question, answer, context)
+        VALUES ('delete', old.id, old.question, old.answer, old.context);
+        INSERT INTO flashcards_fts(rowid, question, answer, context)
+        VALUES (new.id, new.question, new.answer, new.context);
+    END""",
+    "INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')",
+]
+for statement in FLASHCARDS_FTS_DDL:
+    event.listen(Flashcard.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Flashcard.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS flashcards_fts").execute_if(dialect="sqlite"),
+)
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
-    created_at = Column(DateTime, default=get_msk_time, nullable=False)
-    action = Column(String(100), nullable=False)
-    filename = Column(String(255))
-    details = Column(Text)
+    pdf_file_id = Column(Integer, ForeignKey('pdf_files.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.user_id'), index=True, nullable=False)
+    max_cards = Column(Integer, nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    worker_id = Column(String(100))  # кто держит аренду
+    lease_expires_at = Column(DateTime)  # UTC; после истечения задачу может забрать другой воркер
+    error = Column(Text)
+    # Прогресс обработки, его пишет воркер и читает поток событий /{file_id}/events
+    stage = Column(String(20), default="queued", nullable=False)
+    pages_done = Column(Integer, default=0, nullable=False)
+    pages_total = Column(Integer)
+    cards_done = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    pdf_file = relationship("PDFFile")
+
+    # Последняя задача файла (поток событий прогресса опрашивает её по кругу)
+    __table_args__ = (
+        Index("ix_processing_jobs_pdf_file_id_id", "pdf_file_id", "id"),
+    )
+
+class GenerationCacheEntry(Base):
+    # Готовые карточки по (хэш документа, max_cards, модель, профиль генерации)
+    __tablename__ = "generation_cache"
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)
+    max_cards = Column(Integer, nullable=False)
+    model_id = Column(String(255), nullable=False, index=True)
+    profile = Column(String(64), nullable=False)
+    cards = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)  # для вытеснения LRU
 
-    user = relationship("User", back_populates="action_history")
+class CacheVersion(Base):
+    # Версии in-process кэшей: процесс сбрасывает свой кэш, увидев новую версию
+    __tablename__ = "cache_versions"
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
@@ -1,23 +1,27 @@
 from sqlalchemy.orm import Session
-from app.models import ActionLog, ActionType
+from app.models import ActionType
+from app.repositories.event_repository import EventRepository
 from typing import Optional, Dict
 
 
 class ActionLogRepository:
+    # Действия с файлами в том же журнале событий, данные — в payload
     def __init__(self, db: Session):
         self.db = db
+        self.events = EventRepository(db)
 
-    def create(self, user_id: int, file_id: int, action: ActionType, details: Optional[Dict] = None) -> ActionLog:
-        log = ActionLog(user_id=user_id, file_id=file_id, action=action, details=details)
-        self.db.add(log)
-        self.db.commit()
-        self.db.refresh(log)
-        return log
+    def create(
+        self,
+        user_id: int,
+        file_id: int,
+        action: ActionType,
+        details: Optional[Dict] = None,
+        commit: bool = True,
+    ):
+        self.events.add(user_id=user_id, file_id=file_id, action=action.value, payload=details, commit=commit)
 
-    def get_by_file(self, file_id: int, limit: int = 50) -> list[type[ActionLog]]:
-        return self.db.query(ActionLog).filter(ActionLog.file_id == file_id).order_by(ActionLog.timestamp.desc()).limit(
-            limit).all()
+    def get_by_file(self, file_id: int, limit: int = 50) -> list:
+        return self.events.latest_for_file(file_id, limit)
 
-    def get_by_user(self, user_id: int, limit: int = 50) -> list[type[ActionLog]]:
-        return self.db.query(ActionLog).filter(ActionLog.user_id == user_id).order_by(ActionLog.timestamp.desc()).limit(
-            limit).all()
\ No newline at end of file
+    def get_by_user(self, user_id: int, limit: int = 50) -> list:
+        return self.events.latest_for_user(user_id, limit)
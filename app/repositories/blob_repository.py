@@ -0,0 +1,48 @@
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.models import PDFBlob
+
+
+class BlobRepository:
+    # Методы не коммитят: ссылка на blob фиксируется вместе с записью pdf_files
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_hash(self, content_hash: str) -> Optional[PDFBlob]:
+        return self.db.query(PDFBlob).filter(PDFBlob.content_hash == content_hash).first()
+
+    def add_reference(self, content_hash: str) -> Optional[PDFBlob]:
+        result = self.db.execute(
+            update(PDFBlob)
+            .where(PDFBlob.content_hash == content_hash)
+            .values(ref_count=PDFBlob.ref_count + 1)
+        )
+        if result.rowcount == 0:
+            return None
+        return self.get_by_hash(content_hash)
+
+    def create(self, content_hash: str, file_key: str, size: int) -> PDFBlob:
+        blob = PDFBlob(content_hash=content_hash, file_key=file_key, size=size, ref_count=1)
+        self.db.add(blob)
+        self.db.flush()
+        return blob
+
+    def release(self, content_hash: str) -> Optional[str]:
+        # Возвращает ключ объекта, если ссылка была последней и объект можно удалять
+        self.db.execute(
+            update(PDFBlob)
+            .where(PDFBlob.content_hash == content_hash, PDFBlob.ref_count > 0)
+            .values(ref_count=PDFBlob.ref_count - 1)
+        )
+        blob = self.get_by_hash(content_hash)
+        if blob is None or blob.ref_count > 0:
+            return None
+        file_key = blob.file_key
+        # Условие ref_count = 0 защищает от загрузки, успевшей добавить ссылку
+        deleted = self.db.execute(
+            delete(PDFBlob).where(PDFBlob.content_hash == content_hash, PDFBlob.ref_count == 0)
+        )
+        return file_key if deleted.rowcount == 1 else None
@@ -0,0 +1,35 @@
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import CacheVersion
+
+
+class CacheVersionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, name: str) -> int:
+        version = self.db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+        return version or 0
+
+    def bump(self, name: str):
+        result = self.db.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == name)
+            .values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            self.db.add(CacheVersion(name=name, version=1))
+            try:
+                self.db.commit()
+                return
+            except IntegrityError:
+                # Строку одновременно создал другой процесс
+                self.db.rollback()
+                self.db.execute(
+                    update(CacheVersion)
+                    .where(CacheVersion.name == name)
+                    .values(version=CacheVersion.version + 1)
+                )
+        self.db.commit()
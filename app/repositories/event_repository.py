@@ -0,0 +1,224 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, MetaData, String, Table, Text, event, inspect, insert, select, text, true
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.pagination import keyset_condition
+from app.models import Event
+from app.models.models import get_msk_time
+
+PARTITION_RE = re.compile(r"^events_\d{6}$")
+FEED_COLUMNS = ("id", "created_at", "action", "filename", "details")
+
+# Имена секций (новые первыми) по базам: другие процессы могут создать или
+# удалить секцию, поэтому список перечитывается раз в минуту
+_partitions = TTLCache(maxsize=16, ttl=60)
+# Секции, уже созданные этим процессом: вставка не проверяет их каждый раз.
+# DDL транзакционный, поэтому секция попадает сюда только после коммита
+# создавшей её сессии; до того она числится в session.info
+_ensured: set = set()
+_tables: Dict[str, Table] = {}
+
+
+@event.listens_for(Session, "after_commit")
+def _partitions_committed(session: Session):
+    created = session.info.pop("created_partitions", None)
+    if created:
+        _ensured.update(created)
+
+
+@event.listens_for(Session, "after_rollback")
+def _partitions_rolled_back(session: Session):
+    created = session.info.pop("created_partitions", None)
+    if created:
+        for bind_key, _ in created:
+            _partitions.pop(bind_key)
+
+
+def month_start(moment: datetime, shift: int = 0) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + shift
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(moment: datetime) -> str:
+    return f"events_{moment:%Y%m}"
+
+
+def event_partition(name: str) -> Table:
+    # Та же структура, что у events, но с одним ключом id: на SQLite это
+    # автоинкремент. На Postgres по этой Table только строятся запросы,
+    # саму секцию создаёт CREATE TABLE ... PARTITION OF
+    table = _tables.get(name)
+    if table is None:
+        table = Table(
+            name, MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("created_at", DateTime, nullable=False),
+            Column("user_id", Integer, nullable=False),
+            Column("file_id", Integer),
+            Column("action", String(50), nullable=False),
+            Column("filename", String(255)),
+            Column("details", Text),
+            Column("payload", JSON),
+            Index(f"ix_{name}_user_created_id", "user_id", "created_at", "id"),
+            Index(f"ix_{name}_file_created", "file_id", "created_at"),
+        )
+        _tables[name] = table
+    return table
+
+
+class EventRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _bind_key(self) -> str:
+        return str(self.db.get_bind().url)
+
+    def _is_postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def add(
+        self,
+        user_id: int,
+        action: str,
+        details: Optional[str] = None,
+        filename: Optional[str] = None,
+        file_id: Optional[int] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        commit: bool = True,
+    ):
+        self.add_many([{
+            "user_id": user_id,
+            "action": action,
+            "details": details,
+            "filename": filename,
+            "file_id": file_id,
+            "payload": payload,
+        }], commit=commit)
+
+    def add_many(self, rows: List[Dict[str, Any]], commit: bool = True):
+        # Строки сразу пишутся в секцию своего месяца, одной вставкой на секцию
+        by_partition = defaultdict(list)
+        now = get_msk_time()
+        for row in rows:
+            # У всех строк одной executemany-вставки должен быть одинаковый набор ключей
+            row = {"created_at": now, "file_id": None, "filename": None, "details": None, "payload": None, **row}
+            by_partition[partition_name(row["created_at"])].append(row)
+        for name, partition_rows in by_partition.items():
+            self.ensure_partition(name)
+            self.db.execute(insert(event_partition(name)), partition_rows)
+        if commit:
+            self.db.commit()
+
+    def ensure_partition(self, name: str):
+        key = (self._bind_key(), name)
+        created = self.db.info.setdefault("created_partitions", set())
+        if key in _ensured or key in created:
+            return
+        if self._is_postgres():
+            start = datetime.strptime(name, "events_%Y%m")
+            end = month_start(start, 1)
+            self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {Event.__tablename__} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            ))
+        else:
+            event_partition(name).create(self.db.connection(), checkfirst=True)
+        created.add(key)
+        _partitions.pop(self._bind_key())
+
+    def ensure_upcoming(self, now: Optional[datetime] = None):
+        # Секции текущего и следующего месяца создаются заранее, чтобы
+        # первая запись месяца не ждала DDL
+        now = now or get_msk_time()
+        for shift in (0, 1):
+            self.ensure_partition(partition_name(month_start(now, shift)))
+        self.db.commit()
+
+    def list_partitions(self) -> List[str]:
+        key = self._bind_key()
+        names = _partitions.get(key)
+        if names is None:
+            names = sorted(
+                (n for n in inspect(self.db.connection()).get_table_names() if PARTITION_RE.match(n)),
+                reverse=True,
+            )
+            _partitions.set(key, names)
+        return names
+
+    def drop_partition(self, name: str):
+        # DROP TABLE вместо DELETE: место освобождается сразу, без построчного удаления
+        self.db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        self.db.commit()
+        _ensured.discard((self._bind_key(), name))
+        _partitions.pop(self._bind_key())
+
+    def drop_expired(self, keep_months: int, now: Optional[datetime] = None) -> List[str]:
+        # Хранится текущий месяц и keep_months - 1 предыдущих
+        cutoff = partition_name(month_start(now or get_msk_time(), -(keep_months - 1)))
+        _partitions.pop(self._bind_key())
+        expired = [name for name in self.list_partitions() if name < cutoff]
+        for name in expired:
+            self.drop_partition(name)
+        return expired
+
+    def _latest(
+        self,
+        where,
+        limit: int,
+        columns: Optional[Sequence[str]] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> list:
+        if self._is_postgres():
+            # Через родительскую таблицу: лишние секции отсекает планировщик,
+            # а секция, удалённая другим процессом, в запрос не попадает
+            return self._read(Event.__table__, where, limit, columns, before)
+        try:
+            return self._read_partitions(where, limit, columns, before)
+        except OperationalError as e:
+            # Список секций в кэше устарел: секцию удалил другой процесс
+            if "no such table" not in str(e):
+                raise
+            _partitions.pop(self._bind_key())
+            return self._read_partitions(where, limit, columns, before)
+
+    def _read_partitions(self, where, limit: int, columns, before) -> list:
+        # Секции читаются от новых к старым, пока не набран limit:
+        # лента последних действий обычно укладывается в одну секцию.
+        # before — ключ (created_at, id) последней строки прошлой страницы;
+        # секции новее него не читаются совсем
+        rows = []
+        newest = partition_name(before[0]) if before else None
+        for name in self.list_partitions():
+            if newest and name > newest:
+                continue
+            rows.extend(self._read(event_partition(name), where, limit - len(rows), columns, before))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def _read(self, table: Table, where, limit: int, columns, before) -> list:
+        query = select(*[table.c[c] for c in columns]) if columns else select(table)
+        query = query.where(where(table))
+        if before:
+            query = query.where(keyset_condition([table.c.created_at, table.c.id], before, descending=True))
+        query = query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit)
+        return self.db.execute(query).all()
+
+    def user_feed(self, user_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None) -> list:
+        # Только столбцы ленты, без payload; порядок совпадает с индексом (user_id, created_at, id)
+        return self._latest(lambda t: t.c.user_id == user_id, limit, FEED_COLUMNS, before)
+
+    def latest_for_user(self, user_id: int, limit: int = 50) -> list:
+        return self._latest(lambda t: t.c.user_id == user_id, limit)
+
+    def latest_for_file(self, file_id: int, limit: int = 50) -> list:
+        return self._latest(lambda t: t.c.file_id == file_id, limit)
+
+    def latest(self, limit: int = 100) -> list:
+        return self._latest(lambda t: true(), limit)
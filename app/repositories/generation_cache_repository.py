@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import GenerationCacheEntry
+
+
+def make_cache_key(content_hash: str, max_cards: int, model_id: str, profile: str) -> str:
+    return hashlib.sha256(f"{content_hash}|{max_cards}|{model_id}|{profile}".encode()).hexdigest()
+
+
+class GenerationCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, content_hash: str, max_cards: int, model_id: str, profile: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self.db.query(GenerationCacheEntry).filter(
+            GenerationCacheEntry.cache_key == make_cache_key(content_hash, max_cards, model_id, profile)
+        ).first()
+        if entry is None:
+            return None
+        entry.last_used_at = datetime.utcnow()
+        self.db.commit()
+        return entry.cards
+
+    def put(
+        self,
+        content_hash: str,
+        max_cards: int,
+        model_id: str,
+        profile: str,
+        cards: List[Dict[str, Any]],
+        max_entries: int,
+    ):
+        entry = GenerationCacheEntry(
+            cache_key=make_cache_key(content_hash, max_cards, model_id, profile),
+            content_hash=content_hash,
+            max_cards=max_cards,
+            model_id=model_id,
+            profile=profile,
+            cards=cards,
+        )
+        self.db.add(entry)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Тот же результат уже положил другой воркер
+            self.db.rollback()
+            return
+        self.evict(max_entries)
+
+    def evict(self, max_entries: int) -> int:
+        # Оставляем max_entries самых недавно использованных записей
+        stale = (
+            select(GenerationCacheEntry.id)
+            .order_by(GenerationCacheEntry.last_used_at.desc(), GenerationCacheEntry.id.desc())
+            .offset(max_entries)
+        )
+        result = self.db.execute(
+            delete(GenerationCacheEntry).where(GenerationCacheEntry.id.in_(stale))
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def invalidate_stale(self, model_id: str, profile: str) -> int:
+        # Карточки другой модели или с другими параметрами генерации больше не выдаются
+        result = self.db.execute(
+            delete(GenerationCacheEntry).where(
+                (GenerationCacheEntry.model_id != model_id) | (GenerationCacheEntry.profile != profile)
+            )
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def clear(self) -> int:
+        result = self.db.execute(delete(GenerationCacheEntry))
+        self.db.commit()
+        return result.rowcount
@@ -1,26 +1,20 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
 from sqlalchemy.orm import Session
-from app.models import ActionHistory
+from app.repositories.event_repository import EventRepository
 
 class HistoryRepository:
+    # История пользователя — чтение единого журнала событий
     def __init__(self, db: Session):
         self.db = db
+        self.events = EventRepository(db)
 
-    def add_action(self, user_id, action, details, filename):
-        record = ActionHistory(
-            user_id=user_id,
-            action=action,
-            details=details,
-            filename=filename
-        )
-        self.db.add(record)
-        self.db.commit()
-        self.db.refresh(record)
-        return record
+    def add_action(self, user_id, action, details, filename=None, commit: bool = True):
+        self.events.add(user_id=user_id, action=action, details=details, filename=filename, commit=commit)
 
-    def get_user_history(self, user_id: int, limit: int = 50) -> list[type[ActionHistory]]:
-        return self.db.query(ActionHistory).filter(
-            ActionHistory.user_id == user_id
-        ).order_by(ActionHistory.created_at.desc()).limit(limit).all()
+    def get_user_history(self, user_id: int, limit: int = 50, before: Optional[Tuple[datetime, int]] = None) -> list:
+        return self.events.user_feed(user_id, limit, before)
 
-    def get_all_history(self) -> list[type[ActionHistory]]:
-        return self.db.query(ActionHistory).order_by(ActionHistory.created_at.desc()).all()
\ No newline at end of file
+    def get_all_history(self, limit: int = 100) -> list:
+        return self.events.latest(limit)
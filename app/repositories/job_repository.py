@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import JobStatus, PDFFile, ProcessingJob, ProcessingStatus
+
+
+class JobLeaseLost(Exception):
+    pass
+
+
+class JobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, pdf_file_id: int, user_id: int, max_cards: int) -> ProcessingJob:
+        job = ProcessingJob(
+            pdf_file_id=pdf_file_id,
+            user_id=user_id,
+            max_cards=max_cards,
+            status=JobStatus.QUEUED,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_by_id(self, job_id: int) -> Optional[ProcessingJob]:
+        return self.db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+
+    def claim_next(self, worker_id: str, lease_seconds: int, max_attempts: int) -> Optional[ProcessingJob]:
+        now = datetime.utcnow()
+        claimable = or_(
+            ProcessingJob.status == JobStatus.QUEUED,
+            and_(
+                ProcessingJob.status == JobStatus.RUNNING,
+                ProcessingJob.lease_expires_at < now,
+            ),
+        )
+        while True:
+            # На Postgres SKIP LOCKED не даёт воркерам толкаться на одной строке,
+            # а условный UPDATE ниже страхует там, где блокировок строк нет (SQLite)
+            candidate = self.db.execute(
+                select(ProcessingJob.id, ProcessingJob.pdf_file_id, ProcessingJob.attempts)
+                .where(claimable)
+                .order_by(ProcessingJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if candidate is None:
+                self.db.commit()
+                return None
+
+            if candidate.attempts >= max_attempts:
+                # Задача и PDF падают одним коммитом, иначе файл навсегда остался бы
+                # в PROCESSING и повторный запуск отвечал бы 409
+                failed = self.db.execute(
+                    update(ProcessingJob)
+                    .where(ProcessingJob.id == candidate.id, claimable)
+                    .values(status=JobStatus.FAILED, stage=JobStatus.FAILED.value, error="Too many attempts", lease_expires_at=None)
+                )
+                if failed.rowcount == 1:
+                    self.db.execute(
+                        update(PDFFile)
+                        .where(PDFFile.id == candidate.pdf_file_id)
+                        .values(status=ProcessingStatus.FAILED)
+                    )
+                self.db.commit()
+                continue
+
+            claimed = self.db.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == candidate.id, claimable)
+                .values(
+                    status=JobStatus.RUNNING,
+                    stage="claimed",
+                    worker_id=worker_id,
+                    attempts=ProcessingJob.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                )
+            )
+            self.db.commit()
+            if claimed.rowcount == 1:
+                return self.get_by_id(candidate.id)
+
+    def extend_lease(self, job_id: int, worker_id: str, lease_seconds: int) -> bool:
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.worker_id == worker_id,
+                ProcessingJob.status == JobStatus.RUNNING,
+            )
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def get_latest_for_file(self, pdf_file_id: int) -> Optional[ProcessingJob]:
+        return (
+            self.db.query(ProcessingJob)
+            .filter(ProcessingJob.pdf_file_id == pdf_file_id)
+            .order_by(ProcessingJob.id.desc())
+            .first()
+        )
+
+    def count_active(self) -> Dict[str, int]:
+        # Глубина очереди: задачи в ожидании и в работе (по индексу status)
+        rows = self.db.execute(
+            select(ProcessingJob.status, func.count())
+            .where(ProcessingJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            .group_by(ProcessingJob.status)
+        ).all()
+        counts = {JobStatus.QUEUED.value: 0, JobStatus.RUNNING.value: 0}
+        counts.update({status.value: count for status, count in rows})
+        return counts
+
+    def update_progress(self, job_id: int, worker_id: str, **progress) -> bool:
+        # Пишет только тот воркер, что держит задачу
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.worker_id == worker_id,
+                ProcessingJob.status == JobStatus.RUNNING,
+            )
+            .values(**progress)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def finish(
+        self,
+        job_id: int,
+        worker_id: str,
+        status: JobStatus,
+        error: Optional[str] = None,
+        commit: bool = True,
+    ) -> bool:
+        # Завершить задачу может только воркер, который её держит: после потери
+        # аренды задачу уже мог забрать другой, и его строку трогать нельзя
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.worker_id == worker_id,
+                ProcessingJob.status == JobStatus.RUNNING,
+            )
+            .values(status=status, stage=status.value, error=error, lease_expires_at=None)
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount == 1
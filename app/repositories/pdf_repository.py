@@ -1,19 +1,34 @@
+from sqlalchemy import Float, func, insert, literal_column, text, update
+from sqlalchemy.sql import column, table
 from sqlalchemy.orm import Session
 from app.models import PDFFile, Flashcard, ProcessingStatus
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+
+from app.core.pagination import keyset_page, offset_page
+from app.core.search import fts5_query
 
 class PDFRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_pdf(self, file_name: str, file_key: str, size: int, mime_type: str, user_id: int) -> PDFFile:
+    def create_pdf(
+        self,
+        file_name: str,
+        file_key: str,
+        size: int,
+        mime_type: str,
+        user_id: int,
+        content_hash: Optional[str] = None,
+    ) -> PDFFile:
         pdf = PDFFile(
             file_name=file_name,
             file_key=file_key,
+            content_hash=content_hash,
             size=size,
             mime_type=mime_type,
             user_id=user_id,
-            status=ProcessingStatus.UPLOADED
+            status=ProcessingStatus.UPLOADED,
+            card_count=0,
         )
         self.db.add(pdf)
         self.db.commit()
@@ -29,9 +44,20 @@ class PDFRepository:
     def get_pdf_by_key(self, file_key: str) -> Optional[PDFFile]:
         return self.db.query(PDFFile).filter(PDFFile.file_key == file_key).first()
 
-    def update_status(self, file_id: int, status: ProcessingStatus):
+    def update_status(self, file_id: int, status: ProcessingStatus, commit: bool = True):
         self.db.query(PDFFile).filter(PDFFile.id == file_id).update({"status": status})
-        self.db.commit()
+        if commit:
+            self.db.commit()
+
+    def claim_for_processing(self, file_id: int, commit: bool = True) -> bool:
+        # Проверка и смена статуса одним условным UPDATE: из двух одновременных
+        # запросов на обработку файл достаётся только одному
+        claimed = self.db.query(PDFFile).filter(
+            PDFFile.id == file_id, PDFFile.status != ProcessingStatus.PROCESSING
+        ).update({"status": ProcessingStatus.PROCESSING}, synchronize_session=False)
+        if commit:
+            self.db.commit()
+        return claimed == 1
 
     def soft_delete_pdf(self, file_id: int):
         self.db.query(PDFFile).filter(PDFFile.id == file_id).update({"is_deleted": True})
@@ -43,44 +69,111 @@ class PDFRepository:
             query = query.filter(PDFFile.user_id == user_id)
         return query.all()
 
-    def save_flashcards(self, pdf_file_id: int, user_id: int, flashcards_data: List[Dict[str, Any]]) -> List[Flashcard]:
-        saved_cards = []
-        for card_data in flashcards_data:
-            flashcard = Flashcard(
-                pdf_file_id=pdf_file_id,
-                user_id=user_id,
-                question=card_data.get("question"),
-                answer=card_data.get("answer"),
-                context=card_data.get("context"),
-                source=card_data.get("source")
-            )
-            self.db.add(flashcard)
-            saved_cards.append(flashcard)
-        self.db.commit()
-        for card in saved_cards:
-            self.db.refresh(card)
-        return saved_cards
+    def save_flashcards(
+        self,
+        pdf_file_id: int,
+        user_id: int,
+        flashcards_data: List[Dict[str, Any]],
+        commit: bool = True,
+    ) -> int:
+        # Все карточки уходят одной executemany-вставкой, без refresh каждой
+        # строки. id не запрашиваются: RETURNING с порядком строк SQLAlchemy
+        # на SQLite выполняет построчно, а вызывающим id не нужны
+        if not flashcards_data:
+            return 0
+        rows = [
+            {
+                "pdf_file_id": pdf_file_id,
+                "user_id": user_id,
+                "question": card_data.get("question"),
+                "answer": card_data.get("answer"),
+                "context": card_data.get("context"),
+                "source": card_data.get("source"),
+            }
+            for card_data in flashcards_data
+        ]
+        self.db.execute(insert(Flashcard), rows)
+        # NULL + n остаётся NULL: непосчитанный счётчик досчитается при чтении
+        self.db.execute(
+            update(PDFFile)
+            .where(PDFFile.id == pdf_file_id)
+            .values(card_count=PDFFile.card_count + len(rows))
+        )
+        if commit:
+            self.db.commit()
+        return len(rows)
 
     def get_cards_for_pdf(
         self,
         pdf_file_id: int,
         user_id: Optional[int] = None,
         admin: bool = False,
-        skip: int = 0,
-        limit: int = 6
-    ) -> list[type[Flashcard]]:
+        cursor: Optional[str] = None,
+        limit: int = 6,
+        skip: Optional[int] = None,
+    ) -> Tuple[List[Flashcard], Optional[str], Optional[str]]:
         query = self.db.query(Flashcard).filter(Flashcard.pdf_file_id == pdf_file_id)
         if not admin and user_id is not None:
             query = query.filter(Flashcard.user_id == user_id)
-        return query.order_by(Flashcard.id).offset(skip).limit(limit).all()
+        columns = (Flashcard.pdf_file_id, Flashcard.id)
+        if skip is not None and not cursor:
+            # Устаревший skip: старые клиенты, курсор в ответе позволяет перейти на него
+            cards, next_cursor = offset_page(query, columns, limit, skip)
+            return cards, next_cursor, None
+        return keyset_page(query, columns, limit, cursor)
+
+    def count_cards_for_pdf(self, pdf_file: PDFFile) -> int:
+        # Счётчик ведётся при сохранении карточек; COUNT(*) только для старых записей
+        if pdf_file.card_count is None:
+            pdf_file.card_count = self.db.query(Flashcard).filter(
+                Flashcard.pdf_file_id == pdf_file.id
+            ).count()
+            self.db.commit()
+        return pdf_file.card_count
 
-    def count_cards_for_pdf(
+    def search_cards(
         self,
-        pdf_file_id: int,
-        user_id: Optional[int] = None,
-        admin: bool = False
-    ) -> int:
-        query = self.db.query(Flashcard).filter(Flashcard.pdf_file_id == pdf_file_id)
-        if not admin and user_id is not None:
-            query = query.filter(Flashcard.user_id == user_id)
-        return query.count()
\ No newline at end of file
+        user_id: int,
+        query_text: str,
+        pdf_file_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        # Ранжированный полнотекстовый поиск по question/answer/context:
+        # Postgres — tsvector + GIN-индекс, SQLite — FTS5-таблица flashcards_fts
+        columns = (
+            Flashcard.id,
+            Flashcard.pdf_file_id,
+            Flashcard.question,
+            Flashcard.answer,
+            Flashcard.context,
+            Flashcard.source,
+            Flashcard.created_at,
+        )
+        if self.db.get_bind().dialect.name == "postgresql":
+            ts_query = func.plainto_tsquery(text("'simple'"), query_text)
+            vector = Flashcard.search_vector(Flashcard.question, Flashcard.answer, Flashcard.context)
+            rank = func.ts_rank(vector, ts_query, type_=Float).label("rank")
+            query = self.db.query(*columns, rank).filter(vector.op("@@")(ts_query))
+            descending = True  # ts_rank: больше — релевантнее
+        else:
+            match = fts5_query(query_text)
+            if not match:
+                return [], None, None
+            fts = table("flashcards_fts", column("rowid"))
+            rank = func.bm25(literal_column("flashcards_fts"), type_=Float).label("rank")
+            query = (
+                self.db.query(*columns, rank)
+                .join(fts, fts.c.rowid == Flashcard.id)
+                .filter(literal_column("flashcards_fts").op("MATCH")(match))
+            )
+            descending = False  # bm25: меньше — релевантнее
+
+        query = query.join(PDFFile, PDFFile.id == Flashcard.pdf_file_id).filter(
+            Flashcard.user_id == user_id,
+            ~Flashcard.is_deleted,
+            ~PDFFile.is_deleted,
+        )
+        if pdf_file_id is not None:
+            query = query.filter(Flashcard.pdf_file_id == pdf_file_id)
+        return keyset_page(query, (rank, Flashcard.id), limit, cursor, descending=descending)
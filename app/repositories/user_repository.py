@@ -21,4 +21,16 @@ class UserRepository:
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
-        return user
\ No newline at end of file
+        return user
+
+    def update_role(self, user_id: int, role: str):
+        self.db.query(User).filter(User.user_id == user_id).update({"role": role})
+        self.db.commit()
+
+    def update_password(self, user_id: int, hashed_password: str):
+        self.db.query(User).filter(User.user_id == user_id).update({"hashed_password": hashed_password})
+        self.db.commit()
+
+    def update_email(self, user_id: int, email: str):
+        self.db.query(User).filter(User.user_id == user_id).update({"email": email})
+        self.db.commit()
@@ -1,13 +1,22 @@
 from fastapi import APIRouter, Query, HTTPException
-from app.services.dictionary_service import get_word_definition
+from app.core.query_budget import query_budget
+from app.schemas.dictionary import DictionaryBatchRequest, DictionaryBatchResponse
+from app.services.dictionary_service import get_word_definition, get_word_definitions
 
 router = APIRouter()
 
 @router.get("")
+@query_budget(0)
 async def dictionary(word: str = Query(..., description="English word to define")):
     try:
         return await get_word_definition(word)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=503, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/batch", response_model=DictionaryBatchResponse)
+@query_budget(0)
+async def dictionary_batch(payload: DictionaryBatchRequest):
+    return {"success": True, "results": await get_word_definitions(payload.words)}
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 from fastapi.responses import HTMLResponse
 
+from app.core.query_budget import query_budget
+
 router = APIRouter()
 
 @router.get("/about", response_class=HTMLResponse)
+@query_budget(0)
 async def about():
     html_content = """
 <!DOCTYPE html>
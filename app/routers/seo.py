@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Response
 from fastapi.responses import PlainTextResponse
 
+from app.core.query_budget import query_budget
+
 router = APIRouter()
 
 @router.get("/sitemap.xml")
+@query_budget(0)
 async def sitemap():
     base_url = "http://localhost:3000"
     xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -17,6 +20,7 @@ async def sitemap():
     return Response(content=xml_content, media_type="application/xml")
 
 @router.get("/robots.txt", response_class=PlainTextResponse)
+@query_budget(0)
 async def robots():
     content = """User-agent: *
 Allow: /
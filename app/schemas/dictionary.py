@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+class DictionaryBatchRequest(BaseModel):
+    words: List[str] = Field(..., min_length=1, max_length=settings.DICTIONARY_BATCH_MAX_WORDS)
+
+class DictionaryBatchItem(BaseModel):
+    ok: bool
+    data: Optional[Dict[str, Any]] = None
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+class DictionaryBatchResponse(BaseModel):
+    success: bool
+    # Ключ — слово в том виде, как оно пришло в запросе
+    results: Dict[str, DictionaryBatchItem]
@@ -11,6 +11,15 @@ class PDFProcessingResponse(BaseModel):
     success: bool
     status: str
     message: str
+    job_id: Optional[int] = None
+
+class JobStatusResponse(BaseModel):
+    success: bool
+    job_id: int
+    file_id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
 
 class PDFInfo(BaseModel):
     id: int
@@ -38,6 +47,24 @@ class CardsResponse(BaseModel):
     file_name: str
     cards: List[FlashcardSchema]
     total: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class CardSearchItem(BaseModel):
+    id: int
+    pdf_file_id: int
+    question: str
+    answer: str
+    context: Optional[str] = None
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+    rank: float
+
+class CardSearchResponse(BaseModel):
+    success: bool
+    items: List[CardSearchItem]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 class DeleteResponse(BaseModel):
     success: bool
@@ -52,4 +79,5 @@ class HistoryItem(BaseModel):
 
 class HistoryResponse(BaseModel):
     success: bool
-    history: List[HistoryItem]
\ No newline at end of file
+    history: List[HistoryItem]
+    next_before: Optional[str] = None
\ No newline at end of file
@@ -1,12 +1,18 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.repositories.user_repository import UserRepository
+from app.repositories.generation_cache_repository import GenerationCacheRepository
+from app.core.user_cache import user_cache
+from app.services.base import DBService
 from app.models import User, UserRole
 from typing import List, Dict, Any
 
-class AdminService:
-    def __init__(self, db: Session):
-        self.user_repo = UserRepository(db)
+class AdminService(DBService):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db)
+        self.user_repo = UserRepository(self.db)
+        self.cache_repo = GenerationCacheRepository(self.db)
 
     def list_users(self, current_user: User) -> List[Dict[str, Any]]:
         if current_user.role != UserRole.admin:
@@ -23,4 +29,11 @@ class AdminService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         self.user_repo.update_role(target_user_id, new_role.value)
-        return {"success": True, "user_id": target_user_id, "role": new_role.value}
\ No newline at end of file
+        user_cache.invalidate(self.db, target_user_id)
+        return {"success": True, "user_id": target_user_id, "role": new_role.value}
+
+    def clear_generation_cache(self, current_user: User) -> Dict[str, Any]:
+        if current_user.role != UserRole.admin:
+            raise HTTPException(status_code=403, detail="Access denied")
+        removed = self.cache_repo.clear()
+        return {"success": True, "removed": removed}
@@ -1,31 +1,41 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 from app.core.config import settings
 from app.core.security import (
-    verify_password, get_password_hash,
+    get_password_hash_async, verify_and_update_password_async,
     create_access_token, create_refresh_token, decode_token
 )
 from app.repositories.user_repository import UserRepository
 from app.repositories.token_repository import TokenRepository
+from app.services.base import DBService
 
-class AuthService:
-    def __init__(self, db: Session):
-        self.user_repo = UserRepository(db)
-        self.token_repo = TokenRepository(db)
+class AuthService(DBService):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db)
+        self.user_repo = UserRepository(self.db)
+        self.token_repo = TokenRepository(self.db)
 
-    def register(self, email: str, password: str):
-        if self.user_repo.get_by_email(email):
+    # Запросы к БД идут через run_db, Argon2 — в отдельном пуле хэширования
+    async def register(self, email: str, password: str):
+        if await self.run_db(self.user_repo.get_by_email, email):
             raise HTTPException(status_code=400, detail="Email already registered")
-        hashed = get_password_hash(password)
-        user = self.user_repo.create_user(email, hashed, role="user")
-        return self._create_tokens(user)
+        hashed = await get_password_hash_async(password)
+        user = await self.run_db(self.user_repo.create_user, email, hashed, "user")
+        return await self.run_db(self._create_tokens, user)
 
-    def login(self, email: str, password: str):
-        user = self.user_repo.get_by_email(email)
-        if not user or not verify_password(password, user.hashed_password):
+    async def login(self, email: str, password: str):
+        user = await self.run_db(self.user_repo.get_by_email, email)
+        if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        return self._create_tokens(user)
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        if new_hash:
+            # Хэш сделан с прежними параметрами Argon2 — пересчитываем при входе
+            await self.run_db(self.user_repo.update_password, user.user_id, new_hash)
+        return await self.run_db(self._create_tokens, user)
 
     def refresh(self, refresh_token: str):
         payload = decode_token(refresh_token)
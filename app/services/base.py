@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import run_db, sync_session
+
+
+class DBService:
+    # Сервис работает и с Session (воркеры, скрипты), и с AsyncSession (API).
+    # Репозитории получают синхронный Session; из async-кода их вызывают через run_db
+    def __init__(self, db: Session | AsyncSession):
+        self.session = db
+        self.db = sync_session(db)
+
+    async def run_db(self, fn, *args, **kwargs):
+        return await run_db(self.session, fn, *args, **kwargs)
@@ -1,18 +1,100 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
 import httpx
 from fastapi import HTTPException
 
-DICTIONARY_API_URL = "https://api.dictionaryapi.dev/api/v2/entries/en"
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+DICTIONARY_API_URL = settings.DICTIONARY_API_URL
+
+# Общий клиент: keep-alive соединения к API переиспользуются между запросами
+_client: Optional[httpx.AsyncClient] = None
+
+# Нормализованные ответы и отметки «слова нет» (404)
+_NOT_FOUND = object()
+_cache = TTLCache(settings.DICTIONARY_CACHE_MAX_ENTRIES, settings.DICTIONARY_CACHE_TTL_SECONDS)
+
+# Слова, которые сейчас запрашиваются: одновременные запросы ждут один и тот же вызов
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=settings.DICTIONARY_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.DICTIONARY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DICTIONARY_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def normalize_word(word: str) -> str:
+    return word.strip().lower()
+
 
 async def get_word_definition(word: str):
+    word = normalize_word(word)
+    if not word:
+        raise HTTPException(status_code=400, detail="Word is required")
+
+    cached = _cache.get(word)
+    if cached is _NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Word not found")
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(word)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_definition(word))
+        _inflight[word] = task
+        task.add_done_callback(lambda _: _inflight.pop(word, None))
+    # shield: отмена одного ожидающего запроса не отменяет общий вызов
+    return await asyncio.shield(task)
+
+
+async def get_word_definitions(words: List[str]) -> Dict[str, Dict[str, Any]]:
+    # Каждое слово разрешается независимо: ошибка одного не роняет весь batch.
+    # Ответ — по словам в том виде, как их прислали; "Apple" и "apple" — один запрос к API
+    unique = list(dict.fromkeys(map(normalize_word, words)))
+    semaphore = asyncio.Semaphore(settings.DICTIONARY_BATCH_CONCURRENCY)
+
+    async def resolve(word: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return {"ok": True, "data": await get_word_definition(word)}
+            except HTTPException as e:
+                return {"ok": False, "status": e.status_code, "error": e.detail}
+
+    results = dict(zip(unique, await asyncio.gather(*(resolve(word) for word in unique))))
+    return {word: results[normalize_word(word)] for word in words}
+
+
+async def _fetch_definition(word: str):
     url = f"{DICTIONARY_API_URL}/{word}"
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(url)
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Word not found")
-            response.raise_for_status()
-            data = response.json()
-            return normalize_dictionary_data(data)
+        response = await get_client().get(url)
+        if response.status_code == 404:
+            _cache.set(word, _NOT_FOUND, ttl=settings.DICTIONARY_NEGATIVE_TTL_SECONDS)
+            raise HTTPException(status_code=404, detail="Word not found")
+        response.raise_for_status()
+        data = response.json()
+        result = normalize_dictionary_data(data)
+        _cache.set(word, result)
+        return result
+    except HTTPException:
+        raise
     except httpx.TimeoutException:
         raise HTTPException(status_code=503, detail="Dictionary API timeout")
     except httpx.HTTPStatusError as e:
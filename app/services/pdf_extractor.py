@@ -0,0 +1,92 @@
+# app/services/pdf_extractor.py
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Union
+
+from app.core.config import settings
+
+# Путь к файлу или содержимое PDF в памяти
+PDFSource = Union[str, bytes, bytearray]
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class PageText(NamedTuple):
+    number: int  # номер страницы, начиная с 1
+    total: int
+    text: str
+
+
+class Passage(NamedTuple):
+    page: int
+    text: str
+    sentences: List[str]
+
+
+# Текст отдаётся постранично и лениво: в памяти одновременно только текущая
+# страница, а генерация может стартовать с первой, пока остальные не разобраны.
+def iter_pdf_pages(source: PDFSource) -> Iterator[PageText]:
+    try:
+        import pymupdf
+    except ImportError:
+        pymupdf = None
+
+    if pymupdf is not None:
+        yield from _iter_pymupdf(pymupdf, source)
+    else:
+        yield from _iter_pdfium(source)
+
+
+def _iter_pymupdf(pymupdf, source: PDFSource) -> Iterator[PageText]:
+    if isinstance(source, str):
+        doc = pymupdf.open(source)
+    else:
+        doc = pymupdf.open(stream=source, filetype="pdf")
+    try:
+        total = doc.page_count
+        for index in range(total):
+            page = doc.load_page(index)
+            text = page.get_text("text")
+            del page
+            yield PageText(index + 1, total, text)
+    finally:
+        doc.close()
+
+
+def _iter_pdfium(source: PDFSource) -> Iterator[PageText]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        total = len(pdf)
+        for index in range(total):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            yield PageText(index + 1, total, text)
+    finally:
+        pdf.close()
+
+
+# Фрагменты режутся по границам предложений и не пересекают страницы
+def iter_passages(
+    pages: Iterable[PageText],
+    max_chars: int = settings.QA_PASSAGE_MAX_CHARS,
+) -> Iterator[Passage]:
+    for page in pages:
+        text = _WHITESPACE.sub(" ", page.text).strip()
+        if not text:
+            continue
+
+        sentences: List[str] = []
+        size = 0
+        for sentence in _SENTENCE_SPLIT.split(text):
+            if sentences and size + len(sentence) > max_chars:
+                yield Passage(page.number, " ".join(sentences), sentences)
+                sentences, size = [], 0
+            sentences.append(sentence)
+            size += len(sentence) + 1
+        if sentences:
+            yield Passage(page.number, " ".join(sentences), sentences)
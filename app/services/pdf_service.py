@@ -1,31 +1,67 @@
-import os
-import tempfile
-from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+import json
+import time
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Dict, Any, List, Optional, Tuple
 
 from fastapi import HTTPException, UploadFile
 from minio.error import S3Error
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.repositories.pdf_repository import PDFRepository
 from app.repositories.history_repository import HistoryRepository
-from app.repositories.actionlog_repository import ActionLogRepository
-from app.models import User, ProcessingStatus, ActionType, PDFFile
-from app.services.qa_generator_service import QAGeneratorService
+from app.repositories.event_repository import EventRepository
+from app.repositories.job_repository import JobLeaseLost, JobRepository
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.generation_cache_repository import GenerationCacheRepository
+from app.models import User, ProcessingStatus, ActionType, PDFFile, JobStatus, Event
+from app.core.audit import audit_sink
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page, offset_page
+from app.core.search import LIKE_ESCAPE, contains_pattern
+from app.services.base import DBService
+from app.services.qa_generator_service import ProgressCallback, QAGeneratorService, generation_profile
 from app.minio_client import (
     upload_file_to_minio,
     delete_file_from_minio,
     generate_presigned_url,
+    storage,
     MINIO_BUCKET_PDF,
 )
-from app.database import SessionLocal
 
 
-class PDFService:
-    def __init__(self, db: Session, qa_service: QAGeneratorService):
-        self.db = db
-        self.pdf_repo = PDFRepository(db)
-        self.history_repo = HistoryRepository(db)
-        self.action_log_repo = ActionLogRepository(db)
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def scan_pdf_upload(raw: BinaryIO) -> Tuple[str, int]:
+    # Читает загруженный файл по чанкам: сигнатура по первому чанку,
+    # лимит размера по мере чтения, SHA-256 на ходу
+    sha256 = hashlib.sha256()
+    size = 0
+    while chunk := raw.read(UPLOAD_CHUNK_SIZE):
+        if size == 0 and not chunk.startswith(b"%PDF"):
+            raise HTTPException(status_code=400, detail="Invalid PDF file")
+        size += len(chunk)
+        if size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=400, detail="File too large. Max 10 MB")
+        sha256.update(chunk)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Invalid PDF file")
+    return sha256.hexdigest(), size
+
+
+class PDFService(DBService):
+    def __init__(self, db: Session | AsyncSession, qa_service: Optional[QAGeneratorService] = None):
+        super().__init__(db)
+        self.pdf_repo = PDFRepository(self.db)
+        self.history_repo = HistoryRepository(self.db)
+        self.event_repo = EventRepository(self.db)
+        self.job_repo = JobRepository(self.db)
+        self.blob_repo = BlobRepository(self.db)
+        self.cache_repo = GenerationCacheRepository(self.db)
         self.qa_service = qa_service
 
     def _get_owned_pdf(self, file_id: int, user: User) -> PDFFile:
@@ -35,42 +71,32 @@ class PDFService:
         return pdf_file
 
     async def upload_pdf(self, file: UploadFile, user: User) -> Dict[str, Any]:
-        contents = await file.read()
-        file_size = len(contents)
-
-        # 1. Ограничение размера: до 10 МБ
-        if file_size > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large. Max 10 MB")
-
-        # 2. Проверка имени файла и расширения
+        # 1. Проверка имени файла и расширения
         if not file.filename or not file.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-        # 3. Проверка content_type от клиента
+        # 2. Проверка content_type от клиента
         if file.content_type not in ("application/pdf", "application/x-pdf"):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-        # 4. Проверка сигнатуры файла (magic number)
-        if not contents.startswith(b"%PDF"):
-            raise HTTPException(status_code=400, detail="Invalid PDF file")
+        # 3. Ограничение размера: до 10 МБ (если размер известен заранее)
+        if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=400, detail="File too large. Max 10 MB")
 
-        from app.minio_client import generate_file_key
+        # 4. Сигнатура, размер и хэш считаются потоково, файл целиком в память не читается
+        content_hash, file_size = await asyncio.to_thread(scan_pdf_upload, file.file)
+        await file.seek(0)
 
-        file_key = generate_file_key(file.filename)
+        blob = await self._store_blob(file, file_size, content_hash)
 
-        await upload_file_to_minio(
-            file_data=contents,
-            bucket=MINIO_BUCKET_PDF,
-            object_name=file_key,
-            content_type=file.content_type or "application/pdf",
-        )
-
-        db_file = self.pdf_repo.create_pdf(
+        db_file = await self.run_db(
+            self.pdf_repo.create_pdf,
             file_name=file.filename,
-            file_key=file_key,
+            file_key=blob.file_key,
             size=file_size,
             mime_type=file.content_type or "application/pdf",
             user_id=user.user_id,
+            content_hash=content_hash,
         )
 
         return {
@@ -79,16 +105,126 @@ class PDFService:
             "file_name": file.filename,
         }
 
-    def start_processing(self, file_id: int, user: User) -> PDFFile:
+    async def _store_blob(self, file: UploadFile, file_size: int, content_hash: str):
+        # Такое содержимое уже лежит в бакете — достаточно добавить ссылку
+        blob = await self.run_db(self.blob_repo.add_reference, content_hash)
+        if blob is not None:
+            return blob
+
+        from app.minio_client import generate_file_key
+
+        file_key = generate_file_key(file.filename)
+        await upload_file_to_minio(
+            data=file.file,
+            length=file_size,
+            bucket=MINIO_BUCKET_PDF,
+            object_name=file_key,
+            content_type=file.content_type or "application/pdf",
+        )
+        try:
+            return await self.run_db(self.blob_repo.create, content_hash, file_key, file_size)
+        except IntegrityError:
+            # Параллельная загрузка того же файла успела создать blob первой
+            await self.run_db(self.db.rollback)
+            await delete_file_from_minio(MINIO_BUCKET_PDF, file_key)
+            blob = await self.run_db(self.blob_repo.add_reference, content_hash)
+            if blob is None:
+                raise HTTPException(status_code=409, detail="Upload conflict, please retry")
+            return blob
+
+    def start_processing(self, file_id: int, user: User, max_cards: int) -> Dict[str, Any]:
         pdf_file = self._get_owned_pdf(file_id, user)
 
-        if pdf_file.status == ProcessingStatus.PROCESSING:
+        if not self.pdf_repo.claim_for_processing(file_id, commit=False):
+            self.db.rollback()
             raise HTTPException(status_code=409, detail="File is already being processed")
 
-        self.pdf_repo.update_status(file_id, ProcessingStatus.PROCESSING)
-        self.db.commit()
+        # Этот документ с теми же параметрами уже обрабатывался — модель не нужна
+        cached = self._get_cached_cards(pdf_file.content_hash, max_cards)
+        if cached is not None:
+            try:
+                self._save_generated_cards(file_id, user.user_id, pdf_file.file_name, cached)
+            except Exception:
+                self.db.rollback()
+                self.pdf_repo.update_status(file_id, ProcessingStatus.FAILED)
+                raise
+            return {
+                "success": True,
+                "status": ProcessingStatus.PROCESSED.value,
+                "message": f"Карточки готовы: {len(cached)}",
+                "job_id": None,
+            }
+
+        # Захват файла и задача фиксируются одним коммитом внутри enqueue
+        job = self.job_repo.enqueue(file_id, user.user_id, max_cards)
+        return {
+            "success": True,
+            "status": ProcessingStatus.PROCESSING.value,
+            "message": "Обработка поставлена в очередь",
+            "job_id": job.id,
+        }
 
-        return pdf_file
+    def get_job(self, job_id: int, user: User) -> Dict[str, Any]:
+        job = self.job_repo.get_by_id(job_id)
+        if not job or job.user_id != user.user_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {
+            "success": True,
+            "job_id": job.id,
+            "file_id": job.pdf_file_id,
+            "status": job.status.value,
+            "attempts": job.attempts,
+            "error": job.error,
+        }
+
+    def get_progress(self, file_id: int, user: User) -> Dict[str, Any]:
+        pdf_file = self._get_owned_pdf(file_id, user)
+        job = self.job_repo.get_latest_for_file(file_id)
+        if job is None:
+            return {"job_id": None, "status": pdf_file.status.value, "stage": None,
+                    "pages_done": 0, "pages_total": None, "cards_done": 0, "error": None}
+        return {
+            "job_id": job.id,
+            "status": job.status.value,
+            "stage": job.stage,
+            "pages_done": job.pages_done,
+            "pages_total": job.pages_total,
+            "cards_done": job.cards_done,
+            "error": job.error,
+        }
+
+    async def progress_events(
+        self,
+        file_id: int,
+        user: User,
+        progress: Dict[str, Any],
+        is_disconnected: Callable[[], Awaitable[bool]],
+    ) -> AsyncIterator[str]:
+        # Сервер сам перечитывает одну строку задачи по ключу и отправляет
+        # только изменения; клиенту не нужно опрашивать список и счётчики
+        last = None
+        sent_at = time.monotonic()
+        while True:
+            if progress != last:
+                last = progress
+                sent_at = time.monotonic()
+                yield f"event: progress\ndata: {json.dumps(progress, ensure_ascii=False)}\n\n"
+                if progress["job_id"] is None or progress["status"] in (JobStatus.DONE.value, JobStatus.FAILED.value):
+                    return
+            elif time.monotonic() - sent_at >= settings.JOB_EVENTS_HEARTBEAT_SECONDS:
+                sent_at = time.monotonic()
+                yield ": ping\n\n"
+
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+            if await is_disconnected():
+                return
+            try:
+                progress = await self.run_db(self.get_progress, file_id, user)
+            except HTTPException:
+                return  # файл удалили, пока шла обработка
+            finally:
+                # Между опросами соединение возвращается в пул
+                await self.session.close()
 
     def process_pdf_sync(
         self,
@@ -97,72 +233,97 @@ class PDFService:
         filename: str,
         user_id: int,
         max_cards: int,
-    ):
-        db = SessionLocal()
-        tmp_path = None
+        content_hash: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        job: Optional[Tuple[int, str]] = None,
+    ) -> bool:
+        # job — (id задачи, id воркера): задача завершается в той же транзакции,
+        # что и карточки, и только пока воркер её держит
+        report = on_progress or (lambda stage, **fields: None)
         try:
-            pdf_repo = PDFRepository(db)
-            history_repo = HistoryRepository(db)
-            action_log_repo = ActionLogRepository(db)
+            # Задача могла простоять в очереди, пока такой же документ обработал другой воркер
+            flashcards = self._get_cached_cards(content_hash, max_cards)
+            if flashcards is not None:
+                report("cached", cards_done=len(flashcards))
+            else:
+                flashcards = self._generate_cards(file_key, max_cards, report)
+                if content_hash:
+                    self.cache_repo.put(
+                        content_hash, max_cards, settings.QA_MODEL_NAME, generation_profile(),
+                        flashcards, max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+                    )
+
+            report("saving", cards_done=len(flashcards))
+            self._save_generated_cards(file_id, user_id, filename, flashcards, job)
+            return True
+        except JobLeaseLost:
+            self.db.rollback()
+            print(f"⚠️ Задача {job[0]} перешла к другому воркеру, результат PDF {file_id} отброшен")
+            return False
+        except Exception as e:
+            self.db.rollback()
+            self.pdf_repo.update_status(file_id, ProcessingStatus.FAILED, commit=False)
+            if job is not None and not self.job_repo.finish(*job, JobStatus.FAILED, "Processing failed", commit=False):
+                # Файл обрабатывает другой воркер — его статус не трогаем
+                self.db.rollback()
+            else:
+                self.db.commit()
+            import traceback
 
-            from app.minio_client import client
+            traceback.print_exc()
+            print(f"Ошибка обработки PDF {file_id}: {e}")
+            return False
 
-            try:
-                info = client.stat_object(MINIO_BUCKET_PDF, file_key)
-                print(f"✅ Объект найден в MinIO: {file_key}, размер {info.size} байт")
-            except S3Error as e:
-                print(f"❌ Объект {file_key} не найден в MinIO: {e}")
-                raise Exception(
-                    f"Объект {file_key} не существует в бакете {MINIO_BUCKET_PDF}"
-                )
-
-            fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
-            os.close(fd)
-
-            client.fget_object(MINIO_BUCKET_PDF, file_key, tmp_path)
-
-            downloaded_size = os.path.getsize(tmp_path)
-            print(f"📥 Скачано {downloaded_size} байт в {tmp_path}")
-            if downloaded_size == 0:
-                raise Exception(
-                    f"Скачанный файл пуст, ожидалось {info.size} байт"
-                )
-
-            flashcards = self.qa_service.process_pdf(tmp_path, max_cards)
-
-            pdf_repo.save_flashcards(file_id, user_id, flashcards)
-            pdf_repo.update_status(file_id, ProcessingStatus.PROCESSED)
-
-            history_repo.add_action(
-                user_id=user_id,
-                action="process",
-                details=f"Обработано {len(flashcards)} карточек",
-                filename=filename,
+    def _generate_cards(self, file_key: str, max_cards: int, report: ProgressCallback) -> List[Dict[str, Any]]:
+        # PDF скачивается одним запросом в память; на диск уходят только
+        # файлы больше PROCESSING_SPILL_THRESHOLD_BYTES
+        try:
+            report("downloading")
+            with storage.fetch_object(
+                MINIO_BUCKET_PDF, file_key, settings.PROCESSING_SPILL_THRESHOLD_BYTES
+            ) as source:
+                if isinstance(source, bytes) and not source:
+                    raise Exception(f"Объект {file_key} пуст")
+                report("downloaded")
+                return self.qa_service.process_pdf(source, max_cards, on_progress=report)
+        except S3Error as e:
+            print(f"❌ Объект {file_key} не найден в MinIO: {e}")
+            raise Exception(
+                f"Объект {file_key} не существует в бакете {MINIO_BUCKET_PDF}"
             )
 
-            action_log_repo.create(
-                user_id=user_id,
-                file_id=file_id,
-                action=ActionType.GENERATE_CARDS,
-                details={"count": len(flashcards)},
-            )
+    def _get_cached_cards(self, content_hash: Optional[str], max_cards: int) -> Optional[List[Dict[str, Any]]]:
+        if not content_hash:
+            return None
+        return self.cache_repo.get(
+            content_hash, max_cards, settings.QA_MODEL_NAME, generation_profile()
+        )
 
-            db.commit()
-        except Exception as e:
-            pdf_repo.update_status(file_id, ProcessingStatus.FAILED)
-            db.commit()
-            import traceback
+    def _save_generated_cards(
+        self,
+        file_id: int,
+        user_id: int,
+        filename: str,
+        flashcards: List[Dict[str, Any]],
+        job: Optional[Tuple[int, str]] = None,
+    ):
+        # Карточки, статус, запись истории и завершение задачи фиксируются одной транзакцией
+        self.pdf_repo.save_flashcards(file_id, user_id, flashcards, commit=False)
+        self.pdf_repo.update_status(file_id, ProcessingStatus.PROCESSED, commit=False)
+
+        self.event_repo.add(
+            user_id=user_id,
+            action=ActionType.GENERATE_CARDS.value,
+            details=f"Обработано {len(flashcards)} карточек",
+            filename=filename,
+            file_id=file_id,
+            payload={"count": len(flashcards)},
+            commit=False,
+        )
 
-            traceback.print_exc()
-            print(f"Ошибка обработки PDF {file_id}: {e}")
-        finally:
-            db.close()
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                    print(f"🗑 Временный файл {tmp_path} удалён")
-                except Exception as e:
-                    print(f"Не удалось удалить временный файл {tmp_path}: {e}")
+        if job is not None and not self.job_repo.finish(*job, JobStatus.DONE, commit=False):
+            raise JobLeaseLost()
+        self.db.commit()
 
     def get_download_url(self, file_id: int, user: User) -> Dict[str, Any]:
         pdf_file = self._get_owned_pdf(file_id, user)
@@ -177,44 +338,58 @@ class PDFService:
                 detail="Не удалось сгенерировать ссылку для скачивания",
             )
 
-        self.action_log_repo.create(
+        audit_sink.record(
             user_id=user.user_id,
+            action=ActionType.DOWNLOAD.value,
+            details="Ссылка на скачивание",
+            filename=pdf_file.file_name,
             file_id=file_id,
-            action=ActionType.DOWNLOAD,
-            details={"url_expires_in": 3600},
+            payload={"url_expires_in": 3600},
         )
         return {"download_url": url}
 
     def list_pdfs_filtered(
         self,
         user: User,
-        page: int = 1,
+        cursor: Optional[str] = None,
         limit: int = 10,
         status: Optional[ProcessingStatus] = None,
         search: Optional[str] = None,
         sort: str = "created_at_desc",
+        include_total: bool = False,
+        page: Optional[int] = None,
     ) -> Dict[str, Any]:
         query = self.db.query(PDFFile).filter(
             ~PDFFile.is_deleted,
             PDFFile.user_id == user.user_id,
         )
         if search:
-            query = query.filter(PDFFile.file_name.ilike(f"%{search}%"))
+            query = query.filter(PDFFile.file_name.ilike(contains_pattern(search), escape=LIKE_ESCAPE))
         if status:
             query = query.filter(PDFFile.status == status)
-        if sort == "created_at_desc":
-            query = query.order_by(PDFFile.created_at.desc())
-        elif sort == "created_at_asc":
-            query = query.order_by(PDFFile.created_at.asc())
-        elif sort == "name_asc":
-            query = query.order_by(PDFFile.file_name.asc())
-        elif sort == "name_desc":
-            query = query.order_by(PDFFile.file_name.desc())
-
-        total = query.count()
-        items = query.offset((page - 1) * limit).limit(limit).all()
 
-        return {
+        # Устаревший page: старые клиенты получают прежний ответ с total и page
+        legacy = page is not None and not cursor
+
+        # COUNT(*) по всем совпадениям — только по запросу клиента
+        total = query.count() if include_total or legacy else None
+
+        sort_column = PDFFile.created_at if sort.startswith("created_at") else PDFFile.file_name
+        if legacy:
+            items, next_cursor = offset_page(
+                query, (sort_column, PDFFile.id), limit, (page - 1) * limit, descending=sort.endswith("_desc")
+            )
+            prev_cursor = None
+        else:
+            items, next_cursor, prev_cursor = keyset_page(
+                query,
+                (sort_column, PDFFile.id),
+                limit,
+                cursor,
+                descending=sort.endswith("_desc"),
+            )
+
+        result = {
             "success": True,
             "items": [
                 {
@@ -230,18 +405,26 @@ class PDFService:
                 for pdf in items
             ],
             "total": total,
-            "page": page,
             "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         }
+        if legacy:
+            result["page"] = page
+        return result
 
     def get_cards(
-        self, file_id: int, user: User, skip: int = 0, limit: int = 10
+        self,
+        file_id: int,
+        user: User,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        skip: Optional[int] = None,
     ) -> Dict[str, Any]:
         pdf_file = self._get_owned_pdf(file_id, user)
-        cards = self.pdf_repo.get_cards_for_pdf(
-            file_id, user.user_id, skip=skip, limit=limit
+        cards, next_cursor, prev_cursor = self.pdf_repo.get_cards_for_pdf(
+            file_id, user.user_id, cursor=cursor, limit=limit, skip=skip
         )
-        total = self.pdf_repo.count_cards_for_pdf(file_id, user.user_id)
         return {
             "success": True,
             "file_name": pdf_file.file_name,
@@ -260,29 +443,79 @@ class PDFService:
                 }
                 for c in cards
             ],
-            "total": total,
+            "total": self.pdf_repo.count_cards_for_pdf(pdf_file),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    def search_cards(
+        self,
+        user: User,
+        q: str,
+        file_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> Dict[str, Any]:
+        if file_id is not None:
+            self._get_owned_pdf(file_id, user)
+        rows, next_cursor, prev_cursor = self.pdf_repo.search_cards(
+            user.user_id, q, pdf_file_id=file_id, cursor=cursor, limit=limit
+        )
+        return {
+            "success": True,
+            "items": [
+                {
+                    "id": r.id,
+                    "pdf_file_id": r.pdf_file_id,
+                    "question": r.question,
+                    "answer": r.answer,
+                    "context": r.context,
+                    "source": r.source,
+                    "created_at": r.created_at.isoformat()
+                    if r.created_at
+                    else None,
+                    "rank": r.rank,
+                }
+                for r in rows
+            ],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         }
 
-    def delete_pdf(self, file_id: int, user: User) -> Dict[str, Any]:
+    async def delete_pdf(self, file_id: int, user: User) -> Dict[str, Any]:
+        file_name, orphan_key = await self.run_db(self._soft_delete, file_id, user)
+        if orphan_key:
+            await delete_file_from_minio(MINIO_BUCKET_PDF, orphan_key)
+        self._log_delete(file_id, file_name, user)
+        return {"success": True, "message": f"{file_name} deleted"}
+
+    def _soft_delete(self, file_id: int, user: User) -> Tuple[str, Optional[str]]:
         pdf_file = self._get_owned_pdf(file_id, user)
-        delete_file_from_minio(MINIO_BUCKET_PDF, pdf_file.file_key)
+        # Объект удаляется из бакета только вместе с последней ссылкой на содержимое
+        if pdf_file.content_hash:
+            orphan_key = self.blob_repo.release(pdf_file.content_hash)
+        else:
+            orphan_key = pdf_file.file_key
         self.pdf_repo.soft_delete_pdf(file_id)
-        self.history_repo.add_action(
+        return pdf_file.file_name, orphan_key
+
+    def _log_delete(self, file_id: int, file_name: str, user: User):
+        audit_sink.record(
             user_id=user.user_id,
-            action="delete",
+            action=ActionType.DELETE.value,
             details="Файл удалён",
-            filename=pdf_file.file_name,
-        )
-        self.action_log_repo.create(
-            user_id=user.user_id,
+            filename=file_name,
             file_id=file_id,
-            action=ActionType.DELETE,
-            details={"filename": pdf_file.file_name},
         )
-        return {"success": True, "message": f"{pdf_file.file_name} deleted"}
 
-    def get_history(self, user: User, limit: int = 50) -> Dict[str, Any]:
-        actions = self.history_repo.get_user_history(user.user_id)[:limit]
+    def get_history(self, user: User, limit: int = 50, before: Optional[str] = None) -> Dict[str, Any]:
+        before_key = decode_cursor(before, [Event.created_at, Event.id])[0] if before else None
+        # Лишняя строка показывает, есть ли следующая страница
+        actions = self.history_repo.get_user_history(user.user_id, limit + 1, before_key)
+        next_before = None
+        if len(actions) > limit:
+            actions = actions[:limit]
+            next_before = encode_cursor([actions[-1].created_at, actions[-1].id])
         return {
             "success": True,
             "history": [
@@ -297,4 +530,5 @@ class PDFService:
                 }
                 for a in actions
             ],
+            "next_before": next_before,
         }
\ No newline at end of file
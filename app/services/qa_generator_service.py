@@ -1,8 +1,42 @@
 # app/services/qa_generator_service.py
+import hashlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.pdf_extractor import PDFSource, PageText, Passage, iter_pdf_pages, iter_passages
+from app.services.qa_batcher import BatchScheduler
+
+MIN_ANSWER_CHARS = 20
+MAX_ANSWER_CHARS = 300
+PROMPT_FORMAT = "<answer> {answer} <context> {context}"
+
+# on_progress(stage, **поля) — сообщает этап и счётчики обработки
+ProgressCallback = Callable[..., None]
+
+
+# Всё, кроме модели, что влияет на результат генерации; входит в ключ кэша карточек
+def generation_profile() -> str:
+    params = "|".join(str(p) for p in (
+        settings.QA_PASSAGE_MAX_CHARS,
+        settings.QA_CARDS_PER_PASSAGE,
+        MIN_ANSWER_CHARS,
+        MAX_ANSWER_CHARS,
+        PROMPT_FORMAT,
+    ))
+    return hashlib.sha256(params.encode()).hexdigest()[:16]
+
+
 class QAGeneratorService:
     def __init__(self):
         self.generator = None
         self._init_error = None
+        self.model_name = settings.QA_MODEL_NAME
+        self.batcher = BatchScheduler(
+            self._run_batch,
+            max_batch_size=settings.QA_BATCH_SIZE,
+            max_wait_ms=settings.QA_BATCH_MAX_WAIT_MS,
+        )
 
     def _ensure_model(self):
         if self.generator is not None:
@@ -15,7 +49,7 @@ class QAGeneratorService:
             from transformers import pipeline
             self.generator = pipeline(
                 "text2text-generation",
-                model="iarfmoose/t5-base-question-generator"
+                model=self.model_name
             )
             print("✅ QAGenerator инициализирован")
         except Exception as e:
@@ -23,5 +57,77 @@ class QAGeneratorService:
             raise RuntimeError(f"QA model init failed: {e}")
 
     def generate(self, text: str):
+        return self.batcher.submit(text).result()
+
+    def _run_batch(self, texts: List[str]) -> List[Any]:
         self._ensure_model()
-        return self.generator(text)
\ No newline at end of file
+        results = self.generator(texts, batch_size=len(texts))
+        # Для списка входов pipeline отдаёт по одному словарю на вход
+        return [r if isinstance(r, list) else [r] for r in results]
+
+    def process_pdf(
+        self,
+        source: PDFSource,
+        max_cards: int,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> List[Dict[str, Any]]:
+        # Страницы читаются лениво, поэтому обработка останавливается,
+        # как только набрано max_cards карточек, не дочитывая документ.
+        # Запросы к модели отправляются пачкой, не дожидаясь ответа на каждый
+        cards: List[Dict[str, Any]] = []
+        pending: List[Tuple[Future, str, Passage]] = []
+        pages = iter_pdf_pages(source)
+        if on_progress is not None:
+            pages = self._report_pages(pages, cards, on_progress)
+        # Модель может вернуть пустой вопрос, и такой запрос карточкой не станет:
+        # дойдя до max_cards с учётом ожидающих, дожидаемся ответов и добираем
+        # недостающее, пока документ не кончится
+        for passage in iter_passages(pages):
+            for answer in self._select_answers(passage):
+                if len(cards) + len(pending) >= max_cards:
+                    self._collect(pending, cards)
+                    if len(cards) >= max_cards:
+                        break
+                prompt = PROMPT_FORMAT.format(answer=answer, context=passage.text)
+                pending.append((self.batcher.submit(prompt), answer, passage))
+            if len(pending) >= settings.QA_BATCH_SIZE or len(cards) + len(pending) >= max_cards:
+                self._collect(pending, cards)
+            if len(cards) >= max_cards:
+                break
+        self._collect(pending, cards)
+        if on_progress is not None:
+            on_progress("generated", cards_done=len(cards))
+        return cards
+
+    @staticmethod
+    def _report_pages(
+        pages: Iterator[PageText], cards: List[Dict[str, Any]], on_progress: ProgressCallback
+    ) -> Iterator[PageText]:
+        for page in pages:
+            on_progress("generating", pages_done=page.number, pages_total=page.total, cards_done=len(cards))
+            yield page
+
+    def _collect(self, pending: List[Tuple[Future, str, Passage]], cards: List[Dict[str, Any]]):
+        for future, answer, passage in pending:
+            question = self._extract_question(future.result())
+            if question:
+                cards.append({
+                    "question": question,
+                    "answer": answer,
+                    "context": passage.text,
+                    "source": f"page {passage.page}",
+                })
+        pending.clear()
+
+    def _select_answers(self, passage: Passage) -> List[str]:
+        answers = [
+            s for s in passage.sentences
+            if MIN_ANSWER_CHARS <= len(s) <= MAX_ANSWER_CHARS
+        ]
+        return answers[:settings.QA_CARDS_PER_PASSAGE]
+
+    @staticmethod
+    def _extract_question(result) -> str:
+        if not result:
+            return ""
+        return result[0].get("generated_text", "").strip()
@@ -1,13 +1,16 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.repositories.user_repository import UserRepository
-from app.repositories.history_repository import HistoryRepository
-from app.core.security import verify_password, get_password_hash
+from app.core.audit import audit_sink
+from app.core.security import verify_password_async, get_password_hash_async
+from app.core.user_cache import user_cache
+from app.services.base import DBService
 
-class UserService:
-    def __init__(self, db: Session):
-        self.user_repo = UserRepository(db)
-        self.history_repo = HistoryRepository(db)
+class UserService(DBService):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db)
+        self.user_repo = UserRepository(self.db)
 
     def get_profile(self, user_id: int):
         user = self.user_repo.get_by_id(user_id)
@@ -19,38 +22,46 @@ class UserService:
             "role": user.role.value
         }
 
-    def change_password(self, user_id: int, current_password: str, new_password: str):
-        user = self.user_repo.get_by_id(user_id)
+    async def change_password(self, user_id: int, current_password: str, new_password: str):
+        user = await self.run_db(self.user_repo.get_by_id, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        if not verify_password(current_password, user.hashed_password):
+        if not await verify_password_async(current_password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Current password is incorrect")
-        if verify_password(new_password, user.hashed_password):
+        if await verify_password_async(new_password, user.hashed_password):
             raise HTTPException(status_code=400, detail="New password must be different")
-        new_hashed = get_password_hash(new_password)
+        new_hashed = await get_password_hash_async(new_password)
+        await self.run_db(self._save_password, user_id, new_hashed)
+
+    def _save_password(self, user_id: int, new_hashed: str):
         self.user_repo.update_password(user_id, new_hashed)
-        self.history_repo.add_action(
+        user_cache.invalidate(self.db, user_id)
+        audit_sink.record(
             user_id=user_id,
             action="change_password",
             details="Password changed"
         )
 
-    def change_email(self, user_id: int, password: str, new_email: str) -> str:
-        user = self.user_repo.get_by_id(user_id)
+    async def change_email(self, user_id: int, password: str, new_email: str) -> str:
+        user = await self.run_db(self.user_repo.get_by_id, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Password is incorrect")
+        return await self.run_db(self._save_email, user, new_email)
+
+    def _save_email(self, user, new_email: str) -> str:
         existing = self.user_repo.get_by_email(new_email)
-        if existing and existing.user_id != user_id:
+        if existing and existing.user_id != user.user_id:
             raise HTTPException(status_code=400, detail="Email already registered")
         if user.email == new_email:
             raise HTTPException(status_code=400, detail="New email is the same as current")
         old_email = user.email
-        self.user_repo.update_email(user_id, new_email)
-        self.history_repo.add_action(
-            user_id=user_id,
+        self.user_repo.update_email(user.user_id, new_email)
+        user_cache.invalidate(self.db, user.user_id)
+        audit_sink.record(
+            user_id=user.user_id,
             action="change_email",
             details=f"Email changed from {old_email} to {new_email}"
         )
-        return new_email
\ No newline at end of file
+        return new_email
@@ -0,0 +1,270 @@
+# Пул воркеров обработки PDF: python -m app.worker [--processes N] [--threads M]
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+from app.core.config import settings
+from app.core.metrics import JOB_DURATION, JOB_STAGE_DURATION, start_http_server
+from app.database import SessionLocal
+from app.models import JobStatus
+from app.repositories.event_repository import EventRepository
+from app.repositories.generation_cache_repository import GenerationCacheRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.pdf_repository import PDFRepository
+from app.services.pdf_service import PDFService
+from app.services.qa_generator_service import QAGeneratorService, generation_profile
+
+
+class LeaseKeeper:
+    # Продлевает аренду задачи, пока она обрабатывается
+    def __init__(self, session_factory, job_id: int, worker_id: str, lease_seconds: int):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._done.wait(self.lease_seconds / 3):
+            db = self.session_factory()
+            try:
+                if not JobRepository(db).extend_lease(self.job_id, self.worker_id, self.lease_seconds):
+                    print(f"⚠️ Аренда задачи {self.job_id} потеряна")
+                    return
+            except Exception as e:
+                print(f"⚠️ Не удалось продлить аренду задачи {self.job_id}: {e}")
+            finally:
+                db.close()
+
+
+class ProgressReporter:
+    # Пишет прогресс задачи в БД: смену этапа сразу, счётчики внутри этапа —
+    # не чаще min_interval, чтобы не коммитить на каждой странице.
+    # Заодно меряет длительность этапов для метрик
+    def __init__(self, session_factory, job_id: int, worker_id: str, min_interval: float):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.min_interval = min_interval
+        self._stage = None
+        self._last = 0.0
+        self._stage_started = time.monotonic()
+
+    def __call__(self, stage: str, **fields):
+        now = time.monotonic()
+        if stage != self._stage:
+            self._close_stage(now)
+        elif now - self._last < self.min_interval:
+            return
+        self._stage, self._last = stage, now
+        db = self.session_factory()
+        try:
+            JobRepository(db).update_progress(self.job_id, self.worker_id, stage=stage, **fields)
+        except Exception as e:
+            print(f"⚠️ Не удалось записать прогресс задачи {self.job_id}: {e}")
+        finally:
+            db.close()
+
+    def _close_stage(self, now: float):
+        if self._stage is not None:
+            JOB_STAGE_DURATION.observe(now - self._stage_started, self._stage)
+        self._stage_started = now
+
+    def close(self):
+        self._close_stage(time.monotonic())
+
+
+class EventMaintenance:
+    # Секции журнала событий: следующий месяц создаётся заранее, устаревшие
+    # удаляются. Воркер работает месяцами, поэтому не только при старте, а по таймеру
+    def __init__(self, session_factory, interval: float, keep_months: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.keep_months = keep_months
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-maintenance", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+
+    def run_once(self):
+        db = self.session_factory()
+        try:
+            events = EventRepository(db)
+            events.ensure_upcoming()
+            dropped = events.drop_expired(self.keep_months)
+            if dropped:
+                print(f"🗑 Журнал событий: удалены секции {', '.join(dropped)}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ Обслуживание журнала событий не удалось: {e}")
+            if self._done.wait(self.interval):
+                return
+
+
+class Worker:
+    def __init__(
+        self,
+        qa_service: QAGeneratorService,
+        session_factory=SessionLocal,
+        worker_id: str | None = None,
+        stop_event: threading.Event | None = None,
+    ):
+        self.qa_service = qa_service
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stop_event = stop_event or threading.Event()
+
+    def run_once(self) -> bool:
+        db = self.session_factory()
+        try:
+            job = JobRepository(db).claim_next(
+                self.worker_id, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS
+            )
+            if job is None:
+                return False
+            job_id, file_id, user_id, max_cards = job.id, job.pdf_file_id, job.user_id, job.max_cards
+            pdf_file = PDFRepository(db).get_pdf_by_id(file_id)
+            if pdf_file is None:
+                JobRepository(db).finish(job_id, self.worker_id, JobStatus.FAILED, "PDF not found")
+                return True
+            file_key, filename, content_hash = pdf_file.file_key, pdf_file.file_name, pdf_file.content_hash
+        finally:
+            db.close()
+
+        print(f"▶️ [{self.worker_id}] задача {job_id}: PDF {file_id}")
+        started = time.monotonic()
+        status = JobStatus.FAILED
+        db = self.session_factory()
+        try:
+            progress = ProgressReporter(
+                self.session_factory, job_id, self.worker_id, settings.JOB_PROGRESS_INTERVAL_SECONDS
+            )
+            with LeaseKeeper(self.session_factory, job_id, self.worker_id, settings.JOB_LEASE_SECONDS):
+                # Задачу завершает сам сервис, в транзакции с карточками
+                ok = PDFService(db, self.qa_service).process_pdf_sync(
+                    file_id, file_key, filename, user_id, max_cards, content_hash,
+                    on_progress=progress, job=(job_id, self.worker_id),
+                )
+            progress.close()
+            status = JobStatus.DONE if ok else JobStatus.FAILED
+        finally:
+            db.close()
+            JOB_DURATION.observe(time.monotonic() - started, status.value)
+        return True
+
+    def run_forever(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                traceback.print_exc()
+            self.stop_event.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+
+
+def run_process(threads: int, metrics_port: int = 0):
+    # Одна модель на процесс: потоки процесса делят её батчер
+    if metrics_port:
+        start_http_server(metrics_port)
+        print(f"📈 Метрики воркера {os.getpid()}: :{metrics_port}/metrics")
+    qa = QAGeneratorService()
+    try:
+        qa._ensure_model()
+    except Exception as e:
+        print(f"⚠️ QAGenerator не инициализирован: {e}")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    workers = []
+    for _ in range(max(1, threads)):
+        worker = Worker(qa, stop_event=stop_event)
+        thread = threading.Thread(target=worker.run_forever, name=worker.worker_id)
+        thread.start()
+        workers.append(thread)
+    print(f"✅ Воркер {os.getpid()} запущен, потоков: {len(workers)}")
+
+    for thread in workers:
+        thread.join()
+    qa.batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF processing workers")
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES)
+    parser.add_argument("--threads", type=int, default=settings.WORKER_THREADS)
+    args = parser.parse_args()
+
+    # Карточки, сгенерированные прежней моделью или с другими параметрами, больше не выдаются
+    db = SessionLocal()
+    try:
+        removed = GenerationCacheRepository(db).invalidate_stale(settings.QA_MODEL_NAME, generation_profile())
+        if removed:
+            print(f"🗑 Кэш генерации: удалено {removed} устаревших записей")
+    finally:
+        db.close()
+
+    # Секциями журнала занимается только главный процесс, не каждый дочерний
+    with EventMaintenance(
+        SessionLocal, settings.EVENT_MAINTENANCE_INTERVAL_SECONDS, settings.EVENT_RETENTION_MONTHS
+    ):
+        run_workers(args.processes, args.threads)
+
+
+def run_workers(processes: int, threads: int):
+    # У каждого процесса свои метрики и свой порт: WORKER_METRICS_PORT + номер
+    port = settings.WORKER_METRICS_PORT
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        run_process(threads, port)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    children = [
+        ctx.Process(target=run_process, args=(threads, port + i if port else 0), name=f"pdf-worker-{i}")
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+
+    def shutdown(*_):
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for child in children:
+        child.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Пропускная способность Argon2 при текущих (или заданных) параметрах:
+#   python -m benchmarks.bench_password_hashing --threads 1 2 4 --seconds 5
+# Логин = одна проверка хэша, поэтому verify/s ≈ логинов в секунду
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+def measure(context: CryptContext, hashed: str, threads: int, seconds: float) -> float:
+    deadline = time.perf_counter() + seconds
+
+    def loop() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            context.verify("correct horse battery staple", hashed)
+            done += 1
+        return done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: loop(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Argon2 login throughput")
+    parser.add_argument("--time-cost", type=int, default=settings.ARGON2_TIME_COST)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST)
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    context = CryptContext(
+        schemes=["argon2"],
+        argon2__time_cost=args.time_cost,
+        argon2__memory_cost=args.memory_cost,
+        argon2__parallelism=args.parallelism,
+    )
+    hashed = context.hash("correct horse battery staple")
+    cores = os.cpu_count() or 1
+    print(
+        f"argon2 t={args.time_cost} m={args.memory_cost}KiB p={args.parallelism}, "
+        f"ядер: {cores}"
+    )
+
+    started = time.perf_counter()
+    context.hash("correct horse battery staple")
+    print(f"один хэш: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    for threads in args.threads:
+        rate = measure(context, hashed, threads, args.seconds)
+        print(
+            f"потоков {threads:>3}: {rate:8.1f} логинов/с, "
+            f"{rate / min(threads, cores):8.1f} логинов/с на ядро"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# Нагрузочный прогон API целиком, через HTTP:
+#   python -m benchmarks.http_bench --concurrency 16 --requests 500 --output bench-http.json
+#   python -m benchmarks.http_bench --database-url postgresql://... --baseline prev.json
+# Сервер (uvicorn + app.main:app) запускается отдельным процессом, чтобы генератор
+# нагрузки не делил с ним GIL. MinIO заменён хранилищем в памяти, модель генерации —
+# заглушкой. По умолчанию база — временный SQLite-файл, схема создаётся миграциями.
+# Результат — p50/p95/p99 и RPS по каждому маршруту в JSON для сравнения между релизами
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+PASSWORD = "bench-password"
+ROUTES = ["login", "upload", "list", "cards", "download", "history"]
+
+
+class InMemoryObject:
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+        self.headers = {"Content-Length": str(len(data))}
+
+    def read(self) -> bytes:
+        return self._data.read()
+
+    def stream(self, chunk_size: int):
+        while chunk := self._data.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class InMemoryMinio:
+    # Те методы клиента minio, которыми пользуется MinioStorage
+    def __init__(self):
+        self.objects: Dict[tuple, bytes] = {}
+        self.buckets = set()
+        self._lock = threading.Lock()
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    def make_bucket(self, bucket: str):
+        self.buckets.add(bucket)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None, part_size=None):
+        with self._lock:
+            self.objects[(bucket_name, object_name)] = data.read(length)
+
+    def get_object(self, bucket: str, object_name: str) -> InMemoryObject:
+        return InMemoryObject(self.objects[(bucket, object_name)])
+
+    def remove_object(self, bucket: str, object_name: str):
+        with self._lock:
+            self.objects.pop((bucket, object_name), None)
+
+    def presigned_get_object(self, bucket: str, object_name: str, expires: timedelta) -> str:
+        return f"http://storage.local/{bucket}/{object_name}?X-Amz-Expires={int(expires.total_seconds())}"
+
+
+class StubQA:
+    # Вместо модели: карточки сразу, без загрузки весов
+    def process_pdf(self, source, max_cards: int, on_progress=None):
+        cards = [
+            {"question": f"Question {i}?", "answer": f"Answer {i}", "context": "stub", "source": "page 1"}
+            for i in range(max_cards)
+        ]
+        if on_progress is not None:
+            on_progress("generated", cards_done=len(cards))
+        return cards
+
+
+def serve(port: int):
+    # Дочерний процесс: DATABASE_URL уже в окружении, до импорта app
+    import uvicorn
+
+    from app.main import app
+    from app.minio_client import storage
+    from app.worker import Worker
+
+    storage.client = InMemoryMinio()
+    stop_event = threading.Event()
+    worker = Worker(StubQA(), worker_id="bench", stop_event=stop_event)
+    threading.Thread(target=worker.run_forever, name="bench-worker", daemon=True).start()
+    try:
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+    finally:
+        stop_event.set()
+
+
+def seed(users: int, files_per_user: int, cards_per_file: int, events_per_user: int) -> List[dict]:
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import insert
+
+    from app.core.security import get_password_hash
+    from app.database import SessionLocal
+    from app.models import Flashcard, PDFFile, ProcessingStatus, User
+    from app.repositories.event_repository import EventRepository
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+    hashed = get_password_hash(PASSWORD)
+    run_id = uuid.uuid4().hex[:8]
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        accounts = []
+        for i in range(users):
+            user = User(email=f"bench-{run_id}-{i}@example.com", hashed_password=hashed)
+            db.add(user)
+            db.flush()
+            db.execute(insert(PDFFile), [
+                {
+                    "file_name": f"seed-{j}.pdf",
+                    "file_key": f"seed/{run_id}/{i}/{j}.pdf",
+                    "size": 1024,
+                    "mime_type": "application/pdf",
+                    "status": ProcessingStatus.PROCESSED,
+                    "user_id": user.user_id,
+                    "is_deleted": False,
+                    "created_at": now - timedelta(minutes=j),
+                    "card_count": cards_per_file,
+                }
+                for j in range(files_per_user)
+            ])
+            file_ids = [row.id for row in db.query(PDFFile.id).filter(PDFFile.user_id == user.user_id)]
+            if cards_per_file:
+                db.execute(insert(Flashcard), [
+                    {"pdf_file_id": file_id, "user_id": user.user_id, "question": f"Q{k}?", "answer": f"A{k}"}
+                    for file_id in file_ids for k in range(cards_per_file)
+                ])
+            EventRepository(db).add_many([
+                {"user_id": user.user_id, "action": "download", "details": "Ссылка на скачивание",
+                 "created_at": now - timedelta(hours=k)}
+                for k in range(events_per_user)
+            ], commit=False)
+            accounts.append({"email": user.email, "file_ids": file_ids})
+        db.commit()
+        return accounts
+    finally:
+        db.close()
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    # Ближайший ранг: значение, не превышенное p% запросов
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def run_route(client, make_request: Callable, total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await make_request(client)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def run_load(base_url: str, accounts: List[dict], routes: List[str], total: int, concurrency: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for account in accounts:
+            response = await client.post("/api/auth/login", json={"email": account["email"], "password": PASSWORD})
+            response.raise_for_status()
+            account["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        def login(c):
+            account = random.choice(accounts)
+            return c.post("/api/auth/login", json={"email": account["email"], "password": PASSWORD})
+
+        def upload(c):
+            account = random.choice(accounts)
+            content = b"%PDF-1.4\n" + uuid.uuid4().bytes * 64
+            return c.post(
+                "/api/pdf/upload",
+                files={"file": ("bench.pdf", content, "application/pdf")},
+                headers=account["headers"],
+            )
+
+        def list_files(c):
+            return c.get("/api/pdf/list?limit=20", headers=random.choice(accounts)["headers"])
+
+        def cards(c):
+            account = random.choice(accounts)
+            return c.get(f"/api/pdf/cards/{random.choice(account['file_ids'])}?limit=10", headers=account["headers"])
+
+        def download(c):
+            account = random.choice(accounts)
+            return c.get(f"/api/pdf/{random.choice(account['file_ids'])}/download", headers=account["headers"])
+
+        def history(c):
+            return c.get("/api/pdf/history?limit=50", headers=random.choice(accounts)["headers"])
+
+        scenarios = {
+            "login": login, "upload": upload, "list": list_files,
+            "cards": cards, "download": download, "history": history,
+        }
+        results = {}
+        for route in routes:
+            # Короткий прогрев: соединения, кэши процесса, планы запросов
+            await run_route(client, scenarios[route], min(total, concurrency * 2), concurrency)
+            results[route] = await run_route(client, scenarios[route], total, concurrency)
+            stats = results[route]
+            print(
+                f"{route:>9}: {stats['rps']:8.1f} rps  p50 {stats['p50_ms']:7.2f}  "
+                f"p95 {stats['p95_ms']:7.2f}  p99 {stats['p99_ms']:7.2f} мс  ошибок {stats['errors']}"
+            )
+        return results
+
+
+def wait_for_server(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Сервер завершился при запуске")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Сервер не ответил на /health")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_comparison(results: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text())["routes"]
+    print(f"\nотносительно {baseline_path}:")
+    for route, stats in results.items():
+        old = baseline.get(route)
+        if not old:
+            continue
+        rps = (stats["rps"] / old["rps"] - 1) * 100 if old["rps"] else 0.0
+        p95 = (stats["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+        print(f"{route:>9}: rps {rps:+6.1f}%  p95 {p95:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP benchmark")
+    parser.add_argument("--database-url", help="по умолчанию — временный SQLite-файл")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=300, help="запросов на маршрут")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--files-per-user", type=int, default=50)
+    parser.add_argument("--cards-per-file", type=int, default=20)
+    parser.add_argument("--events-per-user", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default="bench-http.json")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    tmp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmp_dir.name}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+
+    accounts = seed(args.users, args.files_per_user, args.cards_per_file, args.events_per_user)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.http_bench", "--serve", "--port", str(args.port)],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    try:
+        wait_for_server(base_url, server)
+        results = asyncio.run(run_load(base_url, accounts, args.routes, args.requests, args.concurrency))
+    finally:
+        # SIGINT — штатная остановка uvicorn с lifespan shutdown
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": database_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+            "users": args.users,
+            "files_per_user": args.files_per_user,
+            "cards_per_file": args.cards_per_file,
+            "events_per_user": args.events_per_user,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "routes": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nрезультат: {args.output}")
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
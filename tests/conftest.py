@@ -2,20 +2,31 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.models import Base, User, UserRole
+from app.core.audit import audit_sink
+from app.core.config import settings
 from app.core.security import get_password_hash
-from app.database import get_db
+from app.core.user_cache import user_cache
+from app.database import get_db, get_async_db
+from app.repositories.event_repository import EventRepository
 from app.main import app
 
 TEST_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+audit_sink.session_factory = TestingSessionLocal
+# Превышение бюджета SQL-запросов и N+1 в тестах — ошибка, а не строка в логе
+settings.QUERY_BUDGET_MODE = "raise"
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -28,11 +39,16 @@ def setup_db():
 @pytest.fixture(autouse=True)
 def clean_tables(setup_db):
     yield
+    audit_sink.shutdown()
     session = TestingSessionLocal()
     for table in reversed(Base.metadata.sorted_tables):
         session.execute(table.delete())
     session.commit()
+    events = EventRepository(session)
+    for name in events.list_partitions():
+        events.drop_partition(name)
     session.close()
+    user_cache.clear()
 
 
 @pytest.fixture
@@ -44,14 +60,21 @@ def db(clean_tables):
         session.close()
 
 
+@pytest.fixture
+def session_factory(clean_tables):
+    return TestingSessionLocal
+
+
 @pytest.fixture(autouse=True)
 def mock_minio():
-    with patch("app.services.pdf_service.upload_file_to_minio") as mock_upload, \
+    from app.minio_client import storage
+    with patch.object(storage, "client", MagicMock()), \
+         patch("app.services.pdf_service.upload_file_to_minio") as mock_upload, \
          patch("app.services.pdf_service.delete_file_from_minio") as mock_delete, \
          patch("app.services.pdf_service.generate_presigned_url", return_value="http://mock/file.pdf"):
         mock_upload.return_value = "mock-file-key.pdf"
         mock_delete.return_value = None
-        yield
+        yield SimpleNamespace(upload=mock_upload, delete=mock_delete)
 
 @pytest.fixture(autouse=True)
 def mock_qa_service():
@@ -69,7 +92,12 @@ def client(db):
     def override_get_db():
         yield db
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -0,0 +1,64 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.audit import AuditSink, audit_sink
+from app.models import ActionType
+from app.repositories.event_repository import EventRepository
+
+
+def count_commits():
+    commits = []
+
+    def listener(conn):
+        commits.append(conn)
+    event.listen(Engine, "commit", listener)
+    return commits, lambda: event.remove(Engine, "commit", listener)
+
+
+def test_sink_flushes_by_size_and_drains_on_shutdown(db, session_factory):
+    sink = AuditSink(session_factory, batch_size=3, interval=60, max_pending=100)
+    sink.record(user_id=1, action="delete", details="Файл удалён", filename="a.pdf", file_id=1)
+    sink.record(user_id=1, action="download", file_id=1, payload={"url_expires_in": 3600})
+    assert sink.pending() == 2
+    assert EventRepository(db).latest_for_user(1) == []
+
+    sink.record(user_id=1, action="change_email", details="Email changed")
+    sink.record(user_id=1, action="change_password", details="Password changed")
+    sink.shutdown()
+
+    assert sink.pending() == 0
+    events = EventRepository(db)
+    assert len(events.latest_for_user(1)) == 4
+    by_file = events.latest_for_file(1)
+    assert {e.action for e in by_file} == {"delete", "download"}
+    assert [e.payload for e in by_file if e.action == "download"] == [{"url_expires_in": 3600}]
+
+
+def test_sink_drops_events_over_limit(session_factory):
+    sink = AuditSink(session_factory, batch_size=100, interval=60, max_pending=1)
+    sink.record(user_id=1, action="a")
+    sink.record(user_id=1, action="b")
+    assert sink.pending() == 1
+    assert sink.dropped == 1
+    sink.shutdown()
+
+
+def test_download_does_not_commit_audit_in_request(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    upload = client.post(
+        "/api/pdf/upload",
+        files={"file": ("test.pdf", b"%PDF-1.4 dummy content", "application/pdf")},
+        headers=headers,
+    )
+    file_id = upload.json()["file_id"]
+
+    commits, stop = count_commits()
+    try:
+        res = client.get(f"/api/pdf/{file_id}/download", headers=headers)
+    finally:
+        stop()
+    assert res.status_code == 200
+    assert commits == []
+
+    audit_sink.shutdown()
+    assert [e.action for e in EventRepository(db).latest_for_file(file_id)] == [ActionType.DOWNLOAD.value]
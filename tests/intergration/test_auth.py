@@ -1,3 +1,13 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import HashingPool
+
+
 def test_login_success(client, user_credentials):
     res = client.post("/api/auth/login", json=user_credentials)
 
@@ -64,4 +74,35 @@ def test_logout_invalidates_refresh(client, user_credentials):
         "refresh_token": refresh
     })
 
-    assert res.status_code == 401
\ No newline at end of file
+    assert res.status_code == 401
+
+
+def test_hashing_pool_rejects_when_queue_full():
+    pool = HashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(release.wait)
+        assert exc.value.status_code == 503
+        release.set()
+        await asyncio.gather(running, queued)
+        # Слоты освобождаются после выполнения
+        assert await pool.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_login_busy_returns_503(client, user_credentials, monkeypatch):
+    monkeypatch.setattr(security, "hashing_pool", HashingPool(workers=1, max_queue=0))
+    security.hashing_pool._slots.acquire()
+    res = client.post("/api/auth/login", json=user_credentials)
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
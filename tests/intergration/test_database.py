@@ -0,0 +1,26 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import async_database_url, sync_database_url
+
+
+def test_database_url_drivers():
+    deployed = "postgresql+asyncpg://app:secret@db:5432/flashcards"
+    assert sync_database_url(deployed) == "postgresql+psycopg2://app:secret@db:5432/flashcards"
+    assert async_database_url(deployed) == deployed
+    assert async_database_url("postgresql://app:secret@db/flashcards") == "postgresql+asyncpg://app:secret@db/flashcards"
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert sync_database_url("sqlite+aiosqlite:///./app.db") == "sqlite:///./app.db"
+
+
+def test_api_requests_use_async_engine(client, user_token):
+    drivers = set()
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        drivers.add(conn.dialect.driver)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        res = client.get("/api/pdf/list?include_total=true", headers={"Authorization": f"Bearer {user_token}"})
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+    assert res.status_code == 200
+    assert drivers == {"aiosqlite"}
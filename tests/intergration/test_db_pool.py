@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.db_pool import instrumented_pool_class
+
+
+def test_pool_counts_checkouts_waits_and_timeouts():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=instrumented_pool_class("test-pool"),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    stats = engine.pool.stats
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        snapshot = stats.snapshot(engine.pool)
+        assert snapshot["checked_out"] == 1
+        assert snapshot["timeouts"] == 1
+        assert snapshot["waits"] == 1
+
+    with engine.connect():
+        pass
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 2
+    assert snapshot["checked_out"] == 0
+
+    # Счётчики переживают пересоздание пула
+    engine.dispose()
+    assert engine.pool.stats.snapshot(engine.pool)["checkouts"] == 2
+
+
+def test_admin_pool_status(client, admin_token):
+    res = client.get("/api/admin/db-pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert res.status_code == 200
+    pools = res.json()["pools"]
+    assert set(pools) == {"api", "worker"}
+    assert {"checkouts", "waits", "timeouts", "checked_out"} <= set(pools["api"])
@@ -1,5 +1,13 @@
+import asyncio
 from unittest.mock import AsyncMock, patch
 
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.services import dictionary_service
+
 def test_dictionary_success(client):
     with patch("app.routers.dictionary.get_word_definition", new_callable=AsyncMock) as mock_dict:
         mock_dict.return_value = {"word": "hello", "definition": "test"}
@@ -10,4 +18,73 @@ def test_dictionary_error(client):
     with patch("app.routers.dictionary.get_word_definition", new_callable=AsyncMock) as mock_dict:
         mock_dict.side_effect = Exception("API down")
         res = client.get("/api/dictionary?word=hello")
-        assert res.status_code == 503
\ No newline at end of file
+        assert res.status_code == 503
+
+HELLO = [{
+    "word": "hello",
+    "phonetic": "/həˈləʊ/",
+    "meanings": [{"partOfSpeech": "noun", "definitions": [{"definition": "A greeting."}]}],
+}]
+
+
+@pytest.fixture
+def stub_dictionary(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        word = request.url.path.rsplit("/", 1)[-1]
+        calls.append(word)
+        await asyncio.sleep(0.05)
+        if word == "hello":
+            return httpx.Response(200, json=HELLO)
+        return httpx.Response(404, json={"title": "No Definitions Found"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(dictionary_service, "_client", client)
+    monkeypatch.setattr(dictionary_service, "_cache", TTLCache(100, 60))
+    monkeypatch.setattr(dictionary_service, "_inflight", {})
+    return calls
+
+
+def test_concurrent_lookups_coalesced(stub_dictionary):
+    async def scenario():
+        results = await asyncio.gather(*[
+            dictionary_service.get_word_definition("Hello ") for _ in range(50)
+        ])
+        assert all(r["word"] == "hello" for r in results)
+        # Повторный запрос — из кэша
+        await dictionary_service.get_word_definition("hello")
+        await dictionary_service.close_client()
+
+    asyncio.run(scenario())
+    assert stub_dictionary == ["hello"]
+
+
+def test_missing_word_cached_as_not_found(stub_dictionary):
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                await dictionary_service.get_word_definition("qwertyuiop")
+            assert exc.value.status_code == 404
+        await dictionary_service.close_client()
+
+    asyncio.run(scenario())
+    assert stub_dictionary == ["qwertyuiop"]
+
+
+def test_dictionary_batch(client, stub_dictionary):
+    res = client.post("/api/dictionary/batch", json={"words": ["hello", "Hello", "qwertyuiop", "  "]})
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert set(results) == {"hello", "Hello", "qwertyuiop", "  "}
+    assert results["hello"]["ok"] is True
+    assert results["hello"]["data"]["definitions"][0]["definition"] == "A greeting."
+    assert results["Hello"] == results["hello"]
+    assert results["  "] == {"ok": False, "data": None, "status": 400, "error": "Word is required"}
+    assert results["qwertyuiop"] == {"ok": False, "data": None, "status": 404, "error": "Word not found"}
+    assert sorted(stub_dictionary) == ["hello", "qwertyuiop"]
+
+
+def test_dictionary_batch_limit(client):
+    res = client.post("/api/dictionary/batch", json={"words": ["w"] * 51})
+    assert res.status_code == 422
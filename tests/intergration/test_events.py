@@ -0,0 +1,155 @@
+import time
+from datetime import datetime
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app.repositories.event_repository import EventRepository
+from app.worker import EventMaintenance
+
+
+def add_at(events, moment, user_id=1, action="delete"):
+    events.add_many([{"user_id": user_id, "action": action, "created_at": moment}])
+
+
+def test_events_are_written_to_monthly_partitions(db):
+    events = EventRepository(db)
+    add_at(events, datetime(2026, 8, 15))
+    add_at(events, datetime(2026, 9, 1))
+    add_at(events, datetime(2026, 9, 30, 23, 59))
+
+    assert events.list_partitions() == ["events_202609", "events_202608"]
+    assert [e.created_at for e in events.latest_for_user(1)] == [
+        datetime(2026, 9, 30, 23, 59), datetime(2026, 9, 1), datetime(2026, 8, 15),
+    ]
+
+
+def test_partition_from_rolled_back_transaction_is_recreated(db):
+    events = EventRepository(db)
+    # Транзакция уже открыта записью, и CREATE TABLE откатывается вместе с ней
+    db.execute(text("DELETE FROM users WHERE user_id = -1"))
+    events.add_many([{"user_id": 1, "action": "delete", "created_at": datetime(2026, 7, 1)}], commit=False)
+    db.rollback()
+    assert events.list_partitions() == []
+
+    add_at(events, datetime(2026, 7, 2))
+    assert [e.created_at for e in events.latest_for_user(1)] == [datetime(2026, 7, 2)]
+
+
+def test_partition_dropped_by_other_process_is_skipped(db, session_factory):
+    events = EventRepository(db)
+    add_at(events, datetime(2026, 8, 15))
+    add_at(events, datetime(2026, 9, 15))
+    assert len(events.latest_for_user(1)) == 2
+
+    # Другой процесс удалил секцию, а список секций здесь ещё в кэше
+    other = session_factory()
+    try:
+        other.execute(text("DROP TABLE events_202608"))
+        other.commit()
+    finally:
+        other.close()
+    assert events.list_partitions() == ["events_202609", "events_202608"]
+
+    assert [e.created_at for e in events.latest_for_user(1)] == [datetime(2026, 9, 15)]
+    assert events.list_partitions() == ["events_202609"]
+
+
+def test_latest_reads_only_needed_partitions(db):
+    events = EventRepository(db)
+    for month in range(1, 7):
+        add_at(events, datetime(2026, month, 10))
+        add_at(events, datetime(2026, month, 20))
+    events.list_partitions()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        rows = events.latest_for_user(1, limit=3)
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+
+    assert [r.created_at for r in rows] == [datetime(2026, 6, 20), datetime(2026, 6, 10), datetime(2026, 5, 20)]
+    assert len(statements) == 2
+    assert "events_202606" in statements[0] and "events_202605" in statements[1]
+
+
+def test_retention_drops_old_partitions(db):
+    events = EventRepository(db)
+    for month in (1, 2, 3, 4):
+        add_at(events, datetime(2026, month, 5))
+
+    dropped = events.drop_expired(keep_months=2, now=datetime(2026, 4, 20))
+
+    assert dropped == ["events_202602", "events_202601"]
+    assert events.list_partitions() == ["events_202604", "events_202603"]
+    assert len(events.latest_for_user(1)) == 2
+
+
+def test_history_feed_pages_with_before_cursor(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    user_id = client.get("/api/profile/me", headers=headers).json()["user_id"]
+    events = EventRepository(db)
+    events.add_many([
+        {"user_id": user_id, "action": "delete", "details": f"#{i}", "created_at": datetime(2026, 1 + i % 3, 1 + i // 6)}
+        for i in range(60)
+    ] + [{"user_id": user_id + 1, "action": "delete", "created_at": datetime(2026, 2, 2)}])
+
+    full = client.get("/api/pdf/history?limit=200", headers=headers).json()
+    assert len(full["history"]) == 60
+    assert full["next_before"] is None
+
+    seen, before = [], None
+    while True:
+        url = "/api/pdf/history?limit=25" + (f"&before={before}" if before else "")
+        page = client.get(url, headers=headers).json()
+        seen.extend(item["details"] for item in page["history"])
+        before = page["next_before"]
+        if before is None:
+            break
+    assert seen == [item["details"] for item in full["history"]]
+
+
+def test_history_feed_selects_only_feed_columns(db):
+    events = EventRepository(db)
+    add_at(events, datetime(2026, 5, 1))
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        rows = events.user_feed(1, limit=10)
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+
+    assert len(rows) == 1
+    assert "payload" not in statements[-1]
+
+
+def test_worker_maintains_partitions_on_timer(db, session_factory):
+    events = EventRepository(db)
+    events.ensure_partition("events_200001")
+    db.commit()
+
+    with EventMaintenance(session_factory, interval=0.05, keep_months=2):
+        for _ in range(100):
+            if "events_200001" not in events.list_partitions():
+                break
+            time.sleep(0.02)
+        upcoming = events.list_partitions()
+        assert "events_200001" not in upcoming
+        assert len(upcoming) == 2
+
+        # Секция, появившаяся после старта, тоже удаляется — на следующем проходе
+        events.ensure_partition("events_200002")
+        db.commit()
+        for _ in range(100):
+            if "events_200002" not in events.list_partitions():
+                break
+            time.sleep(0.02)
+    assert events.list_partitions() == upcoming
@@ -0,0 +1,236 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import ANY, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.minio_client import storage
+from app.models import JobStatus, ProcessingJob, ProcessingStatus, PDFFile, Flashcard
+from app.repositories.generation_cache_repository import GenerationCacheRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.pdf_repository import PDFRepository
+from app.services.pdf_service import PDFService
+from app.worker import Worker
+
+
+def upload(client, token, name="lecture.pdf"):
+    res = client.post(
+        "/api/pdf/upload",
+        files={"file": (name, b"%PDF-1.4 dummy content", "application/pdf")},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200
+    return res.json()["file_id"]
+
+
+def stored_pdf(data=b"%PDF-1.4"):
+    response = MagicMock()
+    response.headers = {"Content-Length": str(len(data))}
+    response.read.return_value = data
+    storage.client.get_object.return_value = response
+    return response
+
+
+def test_process_enqueues_job(client, user_token):
+    file_id = upload(client, user_token)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    res = client.post(f"/api/pdf/{file_id}/process?max_cards=5", headers=headers)
+    assert res.status_code == 200
+    job_id = res.json()["job_id"]
+
+    job = client.get(f"/api/pdf/jobs/{job_id}", headers=headers)
+    assert job.status_code == 200
+    assert job.json()["status"] == "queued"
+    assert job.json()["file_id"] == file_id
+
+    again = client.post(f"/api/pdf/{file_id}/process", headers=headers)
+    assert again.status_code == 409
+
+
+def test_concurrent_process_requests_enqueue_one_job(client, user_token, db, session_factory):
+    file_id = upload(client, user_token)
+    pdf_file = db.query(PDFFile).filter(PDFFile.id == file_id).first()
+    user = pdf_file.user
+    assert pdf_file.status == ProcessingStatus.UPLOADED
+
+    # Второй запрос успел захватить файл, пока первый держит устаревший статус
+    other = session_factory()
+    try:
+        PDFService(other, MagicMock()).start_processing(file_id, other.merge(user), max_cards=5)
+    finally:
+        other.close()
+    with pytest.raises(HTTPException) as exc:
+        PDFService(db, MagicMock()).start_processing(file_id, user, max_cards=5)
+    assert exc.value.status_code == 409
+    assert db.query(ProcessingJob).filter(ProcessingJob.pdf_file_id == file_id).count() == 1
+
+
+def test_claim_respects_lease(client, user_token, db):
+    file_id = upload(client, user_token)
+    client.post(f"/api/pdf/{file_id}/process", headers={"Authorization": f"Bearer {user_token}"})
+    repo = JobRepository(db)
+
+    job = repo.claim_next("w1", lease_seconds=60, max_attempts=3)
+    assert job.worker_id == "w1"
+    assert job.status == JobStatus.RUNNING
+    assert repo.claim_next("w2", lease_seconds=60, max_attempts=3) is None
+
+    db.query(ProcessingJob).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    reclaimed = repo.claim_next("w2", lease_seconds=60, max_attempts=3)
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_job_over_attempts_fails_pdf(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    file_id = upload(client, user_token)
+    client.post(f"/api/pdf/{file_id}/process", headers=headers)
+    db.query(ProcessingJob).update({"attempts": 3})
+    db.commit()
+
+    assert JobRepository(db).claim_next("w1", lease_seconds=60, max_attempts=3) is None
+    db.expire_all()
+    assert db.query(ProcessingJob).one().status == JobStatus.FAILED
+    assert db.query(PDFFile).filter(PDFFile.id == file_id).one().status == ProcessingStatus.FAILED
+    assert client.post(f"/api/pdf/{file_id}/process", headers=headers).status_code == 200
+
+
+def test_worker_discards_result_after_losing_lease(client, user_token, db, session_factory):
+    file_id = upload(client, user_token)
+    client.post(f"/api/pdf/{file_id}/process", headers={"Authorization": f"Bearer {user_token}"})
+    stored_pdf()
+
+    def generate(source, max_cards, on_progress=None):
+        # Пока модель работала, аренда истекла и задачу забрал другой воркер
+        other = session_factory()
+        other.query(ProcessingJob).update({"worker_id": "other"})
+        other.commit()
+        other.close()
+        return [{"question": "Q?", "answer": "A", "context": "ctx", "source": "page 1"}]
+
+    qa = MagicMock()
+    qa.process_pdf.side_effect = generate
+    assert Worker(qa, session_factory=session_factory, worker_id="stale").run_once() is True
+
+    db.expire_all()
+    job = db.query(ProcessingJob).one()
+    assert (job.status, job.worker_id) == (JobStatus.RUNNING, "other")
+    assert db.query(PDFFile).filter(PDFFile.id == file_id).one().status == ProcessingStatus.PROCESSING
+    assert db.query(Flashcard).filter(Flashcard.pdf_file_id == file_id).count() == 0
+
+
+def test_worker_processes_job(client, user_token, db, session_factory):
+    file_id = upload(client, user_token)
+    client.post(f"/api/pdf/{file_id}/process", headers={"Authorization": f"Bearer {user_token}"})
+
+    qa = MagicMock()
+    qa.process_pdf.return_value = [
+        {"question": "Q?", "answer": "A", "context": "ctx", "source": "page 1"}
+    ]
+    stored_pdf()
+
+    worker = Worker(qa, session_factory=session_factory, worker_id="test")
+    assert worker.run_once() is True
+    assert worker.run_once() is False
+    qa.process_pdf.assert_called_once_with(b"%PDF-1.4", 20, on_progress=ANY)
+
+    db.expire_all()
+    assert db.query(ProcessingJob).one().status == JobStatus.DONE
+    assert db.get(PDFFile, file_id).status == ProcessingStatus.PROCESSED
+    assert db.query(Flashcard).filter(Flashcard.pdf_file_id == file_id).count() == 1
+
+
+def test_progress_events_stream_until_done(client, user_token, db, session_factory):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    file_id = upload(client, user_token)
+    client.post(f"/api/pdf/{file_id}/process", headers=headers)
+
+    def fake_process(source, max_cards, on_progress):
+        on_progress("generating", pages_done=1, pages_total=1, cards_done=0)
+        return [{"question": "Q?", "answer": "A", "context": "ctx", "source": "page 1"}]
+
+    qa = MagicMock()
+    qa.process_pdf.side_effect = fake_process
+    stored_pdf()
+    Worker(qa, session_factory=session_factory, worker_id="test").run_once()
+
+    res = client.get(f"/api/pdf/{file_id}/events", headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in res.text.splitlines() if line.startswith("data: ")]
+    assert events[-1]["status"] == "done"
+    assert events[-1]["pages_done"] == 1
+    assert events[-1]["pages_total"] == 1
+    assert events[-1]["cards_done"] == 1
+
+    assert client.get("/api/pdf/999999/events", headers=headers).status_code == 404
+
+
+def test_second_processing_served_from_cache(client, user_token, db, session_factory):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    first = upload(client, user_token, "a.pdf")
+    client.post(f"/api/pdf/{first}/process?max_cards=20", headers=headers)
+
+    qa = MagicMock()
+    qa.process_pdf.return_value = [
+        {"question": f"Q{i}?", "answer": "A", "context": "ctx", "source": "page 1"} for i in range(20)
+    ]
+    stored_pdf()
+    Worker(qa, session_factory=session_factory).run_once()
+
+    second = upload(client, user_token, "a_copy.pdf")
+    # Попадание в кэш укладывается в бюджет запросов маршрута: карточки — одна вставка
+    res = client.post(f"/api/pdf/{second}/process?max_cards=20", headers=headers)
+
+    assert res.status_code == 200
+    assert res.json()["status"] == "processed"
+    assert res.json()["job_id"] is None
+    assert qa.process_pdf.call_count == 1
+    cards = client.get(f"/api/pdf/cards/{second}?limit=3", headers=headers).json()
+    assert [c["question"] for c in cards["cards"]] == ["Q0?", "Q1?", "Q2?"]
+    assert cards["total"] == 20
+
+    other_limit = client.post(f"/api/pdf/{second}/process?max_cards=19", headers=headers)
+    assert other_limit.json()["job_id"] is not None
+
+
+def test_generation_cache_evicts_least_recently_used(db):
+    repo = GenerationCacheRepository(db)
+    for content_hash in ("h1", "h2", "h3"):
+        repo.put(content_hash, 5, "model", "profile", [{"question": content_hash}], max_entries=3)
+    assert repo.get("h1", 5, "model", "profile") is not None
+
+    repo.put("h4", 5, "model", "profile", [], max_entries=3)
+
+    assert repo.get("h2", 5, "model", "profile") is None
+    assert repo.get("h1", 5, "model", "profile") is not None
+    assert repo.invalidate_stale("new-model", "profile") == 3
+
+
+def test_generated_cards_saved_in_one_insert(client, user_token, db):
+    file_id = upload(client, user_token)
+    pdf_file = db.query(PDFFile).filter(PDFFile.id == file_id).first()
+    cards = [
+        {"question": f"Q{i}?", "answer": f"A{i}", "context": "ctx", "source": "page 1"}
+        for i in range(20)
+    ]
+
+    inserts = []
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO FLASHCARDS"):
+            inserts.append(statement)
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        saved_count = PDFRepository(db).save_flashcards(file_id, pdf_file.user_id, cards)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+
+    assert len(inserts) == 1
+    assert saved_count == len(cards)
+    saved = db.query(Flashcard).filter(Flashcard.pdf_file_id == file_id).order_by(Flashcard.id).all()
+    assert [card.question for card in saved] == [card["question"] for card in cards]
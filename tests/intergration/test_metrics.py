@@ -0,0 +1,88 @@
+import asyncio
+import re
+from unittest.mock import MagicMock, patch
+
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    HTTP_LATENCY,
+    JOB_STAGE_DURATION,
+    STORAGE_ERRORS,
+    STORAGE_LATENCY,
+    registry,
+)
+from app.main import _queue_depth
+from app.minio_client import MinioStorage
+from app.worker import ProgressReporter
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    series = f"{name}{{{wanted}}}" if labels else name
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_metrics_by_route_template(client, user_token):
+    registry.clear()
+    _queue_depth.clear()
+    headers = {"Authorization": f"Bearer {user_token}"}
+    upload = client.post(
+        "/api/pdf/upload",
+        files={"file": ("test.pdf", b"%PDF-1.4 dummy content", "application/pdf")},
+        headers=headers,
+    )
+    file_id = upload.json()["file_id"]
+    client.post(f"/api/pdf/{file_id}/process", headers=headers)
+    client.get(f"/api/pdf/cards/{file_id}", headers=headers)
+    client.get("/api/pdf/cards/999999", headers=headers)
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = res.text
+
+    # id не попадает в метки: оба запроса — один шаблон
+    route = "/api/pdf/cards/{file_id}"
+    assert HTTP_LATENCY.count("GET", route) == 2
+    assert sample(text, "http_requests_total", method="GET", route=route, status="200") == 1
+    assert sample(text, "http_requests_total", method="GET", route=route, status="404") == 1
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 2
+    assert DB_QUERIES_PER_REQUEST.sum(route) > 0
+    assert sample(text, "http_requests_in_flight") == 0
+    assert sample(text, "processing_queue_depth", status="queued") == 1
+    assert sample(text, "db_pool_connections", pool="api", state="checked_out") is not None
+    # Сам опрос метрик в них не учитывается
+    assert "/metrics" not in text
+
+
+def test_storage_latency_by_operation():
+    registry.clear()
+    storage = MinioStorage(MagicMock(), max_workers=1)
+    storage.presigned_get_url("bucket", "key.pdf", 60)
+    asyncio.run(storage.remove("bucket", "key.pdf"))
+    storage.client.remove_object.side_effect = RuntimeError("down")
+    try:
+        asyncio.run(storage.remove("bucket", "key.pdf"))
+    except RuntimeError:
+        pass
+    storage.shutdown()
+
+    assert STORAGE_LATENCY.count("presign") == 1
+    assert STORAGE_LATENCY.count("remove") == 2
+    assert STORAGE_ERRORS.value("remove") == 1
+
+
+def test_progress_reporter_observes_stage_durations(session_factory):
+    registry.clear()
+    ticks = iter([0.0, 1.0, 3.0, 3.1, 7.0])
+    with patch("app.worker.time.monotonic", side_effect=lambda: next(ticks)):
+        progress = ProgressReporter(session_factory, job_id=1, worker_id="w", min_interval=10)
+        progress("downloading")
+        progress("generating", pages_done=1)
+        progress("generating", pages_done=2)
+        progress.close()
+
+    assert JOB_STAGE_DURATION.count("downloading") == 1
+    assert JOB_STAGE_DURATION.sum("downloading") == 2.0
+    assert JOB_STAGE_DURATION.count("generating") == 1
+    assert JOB_STAGE_DURATION.sum("generating") == 4.0
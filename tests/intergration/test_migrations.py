@@ -0,0 +1,82 @@
+from datetime import datetime
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.repositories.event_repository import EventRepository
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def alembic_config(url, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    return config
+
+
+def test_migrations_match_models(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    config = alembic_config(url, monkeypatch)
+
+    command.upgrade(config, "head")
+    # Падает, если модели разошлись с цепочкой миграций
+    command.check(config)
+    engine = create_engine(url)
+    assert "flashcards_fts" in inspect(engine).get_table_names()
+
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+
+def test_legacy_journals_moved_to_events(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    config = alembic_config(url, monkeypatch)
+    command.upgrade(config, "0001")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (user_id, email, hashed_password, role) VALUES (1, 'a@b.c', 'x', 'user')"))
+        conn.execute(text(
+            "INSERT INTO pdf_files (id, file_name, file_key, size, mime_type, status, user_id, is_deleted) "
+            "VALUES (7, 'doc.pdf', 'k', 1, 'application/pdf', 'PROCESSED', 1, 0)"
+        ))
+        conn.execute(text(
+            "INSERT INTO action_history (user_id, created_at, action, filename, details) VALUES "
+            "(1, '2026-08-31 23:59:59', 'process', 'doc.pdf', 'Обработано 3 карточек'), "
+            "(1, '2026-09-02 10:00:00', 'change_password', NULL, 'Password changed')"
+        ))
+        conn.execute(text(
+            "INSERT INTO action_logs (user_id, file_id, action, details, timestamp) VALUES "
+            "(1, 7, 'GENERATE_CARDS', '{\"count\": 3}', '2026-08-31 23:59:59.5'), "
+            "(1, 7, 'DOWNLOAD', '{\"url_expires_in\": 3600}', '2026-09-01 12:00:00')"
+        ))
+
+    command.upgrade(config, "head")
+    tables = inspect(engine).get_table_names()
+    assert "action_history" not in tables and "action_logs" not in tables
+    with engine.connect() as conn:
+        august = conn.execute(text("SELECT action, file_id, filename, details, payload FROM events_202608")).all()
+        september = conn.execute(
+            text("SELECT action, file_id, filename, details, created_at FROM events_202609 ORDER BY created_at")
+        ).all()
+    # Пара history + log — одно событие
+    assert august == [("generate_cards", 7, "doc.pdf", "Обработано 3 карточек", '{"count": 3}')]
+    assert september == [
+        ("download", 7, "doc.pdf", "Ссылка на скачивание", "2026-09-01 12:00:00.000000"),
+        ("change_password", None, None, "Password changed", "2026-09-02 10:00:00.000000"),
+    ]
+    # Приложение пишет в секции, созданные миграцией, и читает их
+    with Session(engine) as session:
+        events = EventRepository(session)
+        events.add_many([{"user_id": 1, "action": "upload", "created_at": datetime(2026, 9, 3)}])
+        assert [e.action for e in events.latest_for_user(1)] == [
+            "upload", "change_password", "download", "generate_cards",
+        ]
+    command.check(config)
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
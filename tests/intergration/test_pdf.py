@@ -1,3 +1,8 @@
+from app.core.pagination import encode_cursor
+from app.models import PDFFile
+from app.repositories.pdf_repository import PDFRepository
+
+
 def test_upload_pdf(client, user_token):
     file_content = b"%PDF-1.4 dummy content"
     response = client.post(
@@ -55,4 +60,182 @@ def test_admin_cannot_see_other_users_pdfs(client, user_token, admin_token):
     assert res.status_code == 200
 
     pdf_names = [p["file_name"] for p in res.json()["items"]]
-    assert "user_private.pdf" not in pdf_names
\ No newline at end of file
+    assert "user_private.pdf" not in pdf_names
+
+def test_duplicate_upload_stored_once(client, user_token, mock_minio):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    file_content = b"%PDF-1.4 same lecture"
+    ids = []
+    for name in ("lecture.pdf", "lecture_copy.pdf"):
+        res = client.post(
+            "/api/pdf/upload",
+            files={"file": (name, file_content, "application/pdf")},
+            headers=headers
+        )
+        assert res.status_code == 200
+        ids.append(res.json()["file_id"])
+
+    assert ids[0] != ids[1]
+    assert mock_minio.upload.await_count == 1
+
+    client.delete(f"/api/pdf/{ids[0]}", headers=headers)
+    mock_minio.delete.assert_not_called()
+
+    client.delete(f"/api/pdf/{ids[1]}", headers=headers)
+    mock_minio.delete.assert_called_once()
+
+
+def test_upload_too_large(client, user_token, mock_minio):
+    file_content = b"%PDF-1.4" + b"0" * (10 * 1024 * 1024)
+    response = client.post(
+        "/api/pdf/upload",
+        files={"file": ("big.pdf", file_content, "application/pdf")},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 400
+    mock_minio.upload.assert_not_called()
+
+
+def test_upload_fake_pdf_signature(client, user_token, mock_minio):
+    response = client.post(
+        "/api/pdf/upload",
+        files={"file": ("fake.pdf", b"MZ not a pdf", "application/pdf")},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 400
+    mock_minio.upload.assert_not_called()
+
+def test_list_pdfs_cursor_pagination(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for i in range(5):
+        client.post(
+            "/api/pdf/upload",
+            files={"file": (f"doc{i}.pdf", b"%PDF-1.4 " + bytes([i]), "application/pdf")},
+            headers=headers
+        )
+
+    first = client.get("/api/pdf/list?limit=2&sort=name_asc&include_total=true", headers=headers).json()
+    assert [p["file_name"] for p in first["items"]] == ["doc0.pdf", "doc1.pdf"]
+    assert first["total"] == 5
+    assert first["prev_cursor"] is None
+
+    second = client.get(f"/api/pdf/list?limit=2&sort=name_asc&cursor={first['next_cursor']}", headers=headers).json()
+    assert [p["file_name"] for p in second["items"]] == ["doc2.pdf", "doc3.pdf"]
+    assert second["total"] is None
+
+    last = client.get(f"/api/pdf/list?limit=2&sort=name_asc&cursor={second['next_cursor']}", headers=headers).json()
+    assert [p["file_name"] for p in last["items"]] == ["doc4.pdf"]
+    assert last["next_cursor"] is None
+
+    back = client.get(f"/api/pdf/list?limit=2&sort=name_asc&cursor={last['prev_cursor']}", headers=headers).json()
+    assert [p["file_name"] for p in back["items"]] == ["doc2.pdf", "doc3.pdf"]
+
+    back = client.get(f"/api/pdf/list?limit=2&sort=name_asc&cursor={back['prev_cursor']}", headers=headers).json()
+    assert [p["file_name"] for p in back["items"]] == ["doc0.pdf", "doc1.pdf"]
+    assert back["prev_cursor"] is None
+
+    newest = client.get("/api/pdf/list?limit=3", headers=headers).json()
+    assert [p["file_name"] for p in newest["items"]] == ["doc4.pdf", "doc3.pdf", "doc2.pdf"]
+
+    bad = client.get("/api/pdf/list?cursor=garbage", headers=headers)
+    assert bad.status_code == 400
+
+    # Правильная структура, но типы не те, что у столбцов (file_name, id)
+    for values in ([1, "x"], ["doc1.pdf", "1"], ["doc1.pdf", True], ["doc1.pdf", {"a": 1}]):
+        crafted = encode_cursor(values)
+        assert client.get(f"/api/pdf/list?sort=name_asc&cursor={crafted}", headers=headers).status_code == 400
+    crafted = encode_cursor([123, 1])
+    assert client.get(f"/api/pdf/list?cursor={crafted}", headers=headers).status_code == 400
+
+
+def test_list_and_cards_accept_deprecated_page_and_skip(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for i in range(5):
+        client.post(
+            "/api/pdf/upload",
+            files={"file": (f"doc{i}.pdf", b"%PDF-1.4 " + bytes([i]), "application/pdf")},
+            headers=headers
+        )
+
+    page = client.get("/api/pdf/list?limit=2&sort=name_asc&page=2", headers=headers).json()
+    assert [p["file_name"] for p in page["items"]] == ["doc2.pdf", "doc3.pdf"]
+    assert (page["page"], page["total"]) == (2, 5)
+    rest = client.get(f"/api/pdf/list?limit=2&sort=name_asc&cursor={page['next_cursor']}", headers=headers).json()
+    assert [p["file_name"] for p in rest["items"]] == ["doc4.pdf"]
+
+    file_id = page["items"][0]["id"]
+    pdf_file = db.query(PDFFile).filter(PDFFile.id == file_id).first()
+    PDFRepository(db).save_flashcards(
+        file_id, pdf_file.user_id, [{"question": f"Q{i}?", "answer": f"A{i}"} for i in range(5)]
+    )
+    cards = client.get(f"/api/pdf/cards/{file_id}?limit=2&skip=2", headers=headers).json()
+    assert [c["question"] for c in cards["cards"]] == ["Q2?", "Q3?"]
+    assert cards["total"] == 5
+    crafted = encode_cursor([file_id, "x"])
+    assert client.get(f"/api/pdf/cards/{file_id}?cursor={crafted}", headers=headers).status_code == 400
+
+
+def test_cards_cursor_pagination_uses_counter(client, user_token, db):
+    upload = client.post(
+        "/api/pdf/upload",
+        files={"file": ("cards.pdf", b"%PDF-1.4 cards", "application/pdf")},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    file_id = upload.json()["file_id"]
+    pdf_file = db.query(PDFFile).filter(PDFFile.id == file_id).first()
+    PDFRepository(db).save_flashcards(
+        file_id, pdf_file.user_id,
+        [{"question": f"Q{i}?", "answer": f"A{i}"} for i in range(7)],
+    )
+    db.refresh(pdf_file)
+    assert pdf_file.card_count == 7
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    page = client.get(f"/api/pdf/cards/{file_id}?limit=3", headers=headers).json()
+    questions = [c["question"] for c in page["cards"]]
+    while page["next_cursor"]:
+        page = client.get(f"/api/pdf/cards/{file_id}?limit=3&cursor={page['next_cursor']}", headers=headers).json()
+        questions += [c["question"] for c in page["cards"]]
+    assert questions == [f"Q{i}?" for i in range(7)]
+    assert page["total"] == 7
+
+def test_search_cards_ranked_and_paginated(client, user_token, admin_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    upload = client.post(
+        "/api/pdf/upload",
+        files={"file": ("bio.pdf", b"%PDF-1.4 bio", "application/pdf")},
+        headers=headers
+    )
+    file_id = upload.json()["file_id"]
+    pdf_file = db.query(PDFFile).filter(PDFFile.id == file_id).first()
+    PDFRepository(db).save_flashcards(file_id, pdf_file.user_id, [
+        {"question": "What is a cell?", "answer": "The basic unit of life", "context": "biology"},
+        {"question": "What does the mitochondria do?", "answer": "Produces energy for the cell", "context": "cell cell cell"},
+        {"question": "What is DNA?", "answer": "Genetic material", "context": "found in the cell nucleus"},
+        {"question": "What is a planet?", "answer": "A body orbiting a star", "context": "astronomy"},
+    ])
+
+    first = client.get("/api/pdf/cards/search?q=cell&limit=2", headers=headers).json()
+    assert first["items"][0]["question"] == "What does the mitochondria do?"
+    assert len(first["items"]) == 2
+    rest = client.get(f"/api/pdf/cards/search?q=cell&limit=2&cursor={first['next_cursor']}", headers=headers).json()
+    assert len(rest["items"]) == 1
+    assert rest["next_cursor"] is None
+    found = {c["question"] for c in first["items"] + rest["items"]}
+    assert "What is a planet?" not in found and len(found) == 3
+
+    # Синтаксис FTS5 из запроса не интерпретируется
+    odd = client.get('/api/pdf/cards/search?q="planet*" (star', headers=headers)
+    assert odd.status_code == 200
+    assert [c["question"] for c in odd.json()["items"]] == ["What is a planet?"]
+
+    foreign = client.get("/api/pdf/cards/search?q=cell", headers={"Authorization": f"Bearer {admin_token}"})
+    assert foreign.json()["items"] == []
+
+def test_list_search_escapes_wildcards(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for name, body in (("report_1.pdf", b"%PDF-1.4 a"), ("reportX1.pdf", b"%PDF-1.4 b")):
+        client.post("/api/pdf/upload", files={"file": (name, body, "application/pdf")}, headers=headers)
+
+    res = client.get("/api/pdf/list?search=t_1", headers=headers).json()
+    assert [p["file_name"] for p in res["items"]] == ["report_1.pdf"]
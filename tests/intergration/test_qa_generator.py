@@ -0,0 +1,116 @@
+import threading
+
+import pymupdf
+
+from app.services.pdf_extractor import iter_pdf_pages
+from app.services.qa_batcher import BatchScheduler
+from app.services.qa_generator_service import QAGeneratorService
+
+
+def make_pdf(pages):
+    doc = pymupdf.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_pages_are_extracted_lazily():
+    data = make_pdf([f"Page number {i} talks about photosynthesis." for i in range(1, 4)])
+
+    pages = iter_pdf_pages(data)
+    first = next(pages)
+
+    assert first.number == 1
+    assert first.total == 3
+    assert "Page number 1" in first.text
+    assert [p.number for p in pages] == [2, 3]
+
+
+def test_process_pdf_stops_at_max_cards():
+    data = make_pdf([
+        "Plants convert light into chemical energy. Chlorophyll absorbs mostly blue and red light.",
+        "Mitochondria produce most of the energy in the cell. They have their own DNA molecules.",
+    ])
+    qa = QAGeneratorService()
+    calls = []
+
+    def fake_generator(texts, batch_size):
+        calls.extend(texts)
+        return [{"generated_text": f"Question {i}?"} for i in range(1, len(texts) + 1)]
+
+    qa.generator = fake_generator
+    cards = qa.process_pdf(data, max_cards=3)
+    qa.batcher.close()
+
+    assert len(cards) == 3
+    assert len(calls) == 3
+    assert cards[0]["question"] == "Question 1?"
+    assert cards[0]["source"] == "page 1"
+    assert cards[2]["source"] == "page 2"
+    assert calls[0].startswith("<answer> Plants convert light")
+
+
+def test_process_pdf_replaces_empty_questions():
+    data = make_pdf([
+        "Plants convert light into chemical energy. Chlorophyll absorbs mostly blue and red light.",
+        "Mitochondria produce most of the energy in the cell. They have their own DNA molecules.",
+    ])
+    qa = QAGeneratorService()
+    calls = []
+
+    def fake_generator(texts, batch_size):
+        # Первый запрос модель «проваливает» пустым вопросом
+        results = [{"generated_text": "" if len(calls) + i == 0 else f"Question {len(calls) + i}?"} for i in range(len(texts))]
+        calls.extend(texts)
+        return results
+
+    qa.generator = fake_generator
+    cards = qa.process_pdf(data, max_cards=3)
+    qa.batcher.close()
+
+    assert len(calls) == 4
+    assert [c["question"] for c in cards] == ["Question 1?", "Question 2?", "Question 3?"]
+
+
+def test_process_pdf_reports_page_progress():
+    data = make_pdf([
+        "Plants convert light into chemical energy. Chlorophyll absorbs mostly blue and red light.",
+        "Mitochondria produce most of the energy in the cell. They have their own DNA molecules.",
+    ])
+    qa = QAGeneratorService()
+    qa.generator = lambda texts, batch_size: [{"generated_text": "Question?"} for _ in texts]
+    events = []
+
+    cards = qa.process_pdf(data, max_cards=10, on_progress=lambda stage, **fields: events.append((stage, fields)))
+    qa.batcher.close()
+
+    generating = [fields for stage, fields in events if stage == "generating"]
+    assert [(f["pages_done"], f["pages_total"]) for f in generating] == [(1, 2), (2, 2)]
+    assert events[-1] == ("generated", {"cards_done": len(cards)})
+
+
+def test_batch_scheduler_routes_results_across_jobs():
+    batches = []
+    scheduler = BatchScheduler(
+        lambda texts: batches.append(list(texts)) or [t.upper() for t in texts],
+        max_batch_size=4,
+        max_wait_ms=1000,
+    )
+    results = {}
+
+    def job(word):
+        results[word] = scheduler.submit(word).result()
+
+    threads = [threading.Thread(target=job, args=(w,)) for w in ("a", "b", "c", "d")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    scheduler.close()
+
+    assert results == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert len(batches) == 1
+    assert sorted(batches[0]) == ["a", "b", "c", "d"]
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.query_budget import QueryBudgetExceeded, statement_shape, track_queries
+from app.main import app
+from app.models import PDFFile
+from app.repositories.pdf_repository import PDFRepository
+
+
+def upload(client, headers):
+    res = client.post(
+        "/api/pdf/upload",
+        files={"file": ("test.pdf", b"%PDF-1.4 dummy content", "application/pdf")},
+        headers=headers,
+    )
+    return res.json()["file_id"]
+
+
+def cards_endpoint():
+    return next(r.endpoint for r in app.routes if isinstance(r, APIRoute) and r.path == "/api/pdf/cards/{file_id}")
+
+
+def test_every_route_declares_budget():
+    missing = [
+        f"{sorted(r.methods)} {r.path}"
+        for r in app.routes
+        if isinstance(r, APIRoute) and not hasattr(r.endpoint, "query_budget")
+    ]
+    assert missing == []
+
+
+def test_route_over_budget_raises(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    file_id = upload(client, headers)
+    with patch.object(cards_endpoint(), "query_budget", 1):
+        with pytest.raises(QueryBudgetExceeded, match=r"GET /api/pdf/cards/\{file_id\}: \d+ SQL"):
+            client.get(f"/api/pdf/cards/{file_id}", headers=headers)
+
+
+def test_route_over_budget_warns_in_production(client, user_token, monkeypatch, capsys):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    file_id = upload(client, headers)
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "warn")
+    with patch.object(cards_endpoint(), "query_budget", 1):
+        res = client.get(f"/api/pdf/cards/{file_id}", headers=headers)
+    assert res.status_code == 200
+    assert "при бюджете 1" in capsys.readouterr().out
+
+
+def test_repeated_statement_is_reported(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    ids = [upload(client, headers) for _ in range(5)]
+    repo = PDFRepository(db)
+
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with track_queries("loop"):
+            for file_id in ids:
+                repo.get_pdf_by_id(file_id)
+
+    # Пачка карточек — один INSERT, сколько бы их ни было
+    user_id = db.query(PDFFile).filter(PDFFile.id == ids[0]).first().user_id
+    with track_queries("save_flashcards", max_queries=2) as stats:
+        repo.save_flashcards(ids[0], user_id, [{"question": f"Q{i}?", "answer": "A"} for i in range(50)])
+    assert stats.queries <= 2
+
+
+def test_statement_shape_ignores_list_lengths():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT *\n  FROM t WHERE id IN (?, ?)"
+    )
+    assert statement_shape("INSERT INTO t (a) VALUES (?), (?), (?)") == statement_shape("INSERT INTO t (a) VALUES (?)")
+    assert statement_shape("SELECT * FROM t LIMIT 10") == statement_shape("SELECT * FROM t LIMIT 20")
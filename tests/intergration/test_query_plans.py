@@ -0,0 +1,95 @@
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.engine import Engine
+
+from app.models import Flashcard, PDFFile, ProcessingStatus, User
+from tests.conftest import engine
+
+# Полный проход по таблице или сортировка во временном B-дереве
+BAD_PLAN = re.compile(r"^SCAN (pdf_files|flashcards|processing_jobs)\b|USE TEMP B-TREE FOR ORDER BY")
+
+
+def seed(db, owner_id):
+    other = User(email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.flush()
+    start = datetime(2026, 1, 1)
+    files = [
+        {
+            "file_name": f"doc{i:04}.pdf",
+            "file_key": f"key{i}",
+            "size": 1,
+            "mime_type": "application/pdf",
+            "status": ProcessingStatus.PROCESSED,
+            "user_id": owner_id if i % 2 else other.user_id,
+            "is_deleted": i % 3 == 0,
+            "created_at": start + timedelta(minutes=i),
+            "card_count": 10,
+        }
+        for i in range(600)
+    ]
+    db.execute(insert(PDFFile), files)
+    file_ids = [f.id for f in db.query(PDFFile.id).all()]
+    db.execute(insert(Flashcard), [
+        {"pdf_file_id": file_id, "user_id": owner_id, "question": "Q", "answer": "A"}
+        for file_id in file_ids for _ in range(10)
+    ])
+    db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def capture_selects(fn):
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+    return [(s, p) for s, p in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def plan(statement, parameters):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, tuple(parameters)).all()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(statements, table, index):
+    checked = [(s, p) for s, p in statements if f"FROM {table}" in s]
+    assert checked, f"no queries on {table}"
+    for statement, parameters in checked:
+        details = plan(statement, parameters)
+        assert not [d for d in details if BAD_PLAN.search(d)], f"{statement}\n{details}"
+        assert any(index in d for d in details), f"{statement}\n{details}"
+
+
+def test_file_list_uses_partial_index(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    owner_id = client.get("/api/profile/me", headers=headers).json()["user_id"]
+    seed(db, owner_id)
+
+    for sort, index in (("created_at_desc", "ix_pdf_files_live_user_created_id"), ("name_asc", "ix_pdf_files_live_user_name_id")):
+        first = client.get(f"/api/pdf/list?limit=20&sort={sort}", headers=headers).json()
+        statements = capture_selects(
+            lambda: client.get(f"/api/pdf/list?limit=20&sort={sort}&cursor={first['next_cursor']}", headers=headers)
+        )
+        assert_indexed(statements, "pdf_files", index)
+
+
+def test_cards_page_uses_composite_index(client, user_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    owner_id = client.get("/api/profile/me", headers=headers).json()["user_id"]
+    seed(db, owner_id)
+    file_id = db.query(PDFFile.id).filter(PDFFile.user_id == owner_id, ~PDFFile.is_deleted).first().id
+
+    first = client.get(f"/api/pdf/cards/{file_id}?limit=3", headers=headers).json()
+    statements = capture_selects(
+        lambda: client.get(f"/api/pdf/cards/{file_id}?limit=3&cursor={first['next_cursor']}", headers=headers)
+    )
+    assert_indexed(statements, "flashcards", "ix_flashcards_pdf_user_id")
@@ -0,0 +1,39 @@
+import asyncio
+import io
+import os
+from unittest.mock import MagicMock
+
+from app.minio_client import MinioStorage
+
+
+def test_bucket_existence_checked_once():
+    minio = MagicMock()
+    minio.bucket_exists.return_value = False
+    storage = MinioStorage(minio, max_workers=2)
+
+    async def upload_twice():
+        for name in ("a.pdf", "b.pdf"):
+            await storage.put("pdf-files", name, io.BytesIO(b"%PDF"), 4, "application/pdf")
+
+    asyncio.run(upload_twice())
+    storage.shutdown()
+
+    minio.bucket_exists.assert_called_once_with("pdf-files")
+    minio.make_bucket.assert_called_once_with("pdf-files")
+    assert minio.put_object.call_count == 2
+
+
+def test_fetch_object_spills_large_files_to_disk():
+    minio = MagicMock()
+    response = minio.get_object.return_value
+    response.headers = {"Content-Length": "12"}
+    response.stream.return_value = [b"%PDF-1.4", b" big"]
+    storage = MinioStorage(minio)
+
+    with storage.fetch_object("pdf-files", "big.pdf", spill_threshold=4) as source:
+        assert isinstance(source, str)
+        with open(source, "rb") as f:
+            assert f.read() == b"%PDF-1.4 big"
+
+    assert not os.path.exists(source)
+    response.release_conn.assert_called_once()
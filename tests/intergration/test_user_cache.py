@@ -0,0 +1,70 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.user_cache import UserPrincipalCache, USERS_CACHE_VERSION
+from app.models import User, UserRole
+from app.repositories.cache_version_repository import CacheVersionRepository
+
+
+def count_user_selects():
+    # Слушаем все движки: API ходит в БД через асинхронный
+    statements = []
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM USERS" in statement.upper():
+            statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    return statements, lambda: event.remove(Engine, "before_cursor_execute", listener)
+
+
+def test_current_user_served_from_cache(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.get("/api/profile/me", headers=headers).status_code == 200
+
+    statements, stop = count_user_selects()
+    try:
+        for _ in range(3):
+            assert client.get("/api/pdf/list", headers=headers).status_code == 200
+    finally:
+        stop()
+    assert statements == []
+
+
+def test_role_change_invalidates_cache(client, user_token, admin_token, db):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.get("/api/admin/users", headers=headers).status_code == 403
+
+    user = db.query(User).filter(User.role == UserRole.user).first()
+    res = client.put(
+        f"/api/admin/users/{user.user_id}/role",
+        json={"role": "admin"},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert res.status_code == 200
+    assert client.get("/api/admin/users", headers=headers).status_code == 200
+
+
+def test_email_change_invalidates_cache(client, user_token, user_credentials):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.get("/api/profile/me", headers=headers)
+
+    res = client.post(
+        "/api/profile/change-email",
+        json={"password": user_credentials["password"], "new_email": "renamed@example.com"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert client.get("/api/profile/me", headers=headers).json()["email"] == "renamed@example.com"
+
+
+def test_version_bump_from_other_process_clears_cache(client, user_credentials, db):
+    user = db.query(User).first()
+    cache = UserPrincipalCache(maxsize=10, ttl=60, version_check_seconds=0)
+    assert cache.get(db, user.user_id).role == UserRole.user
+
+    # Роль меняет другой процесс: локальный кэш узнаёт об этом только по версии
+    db.query(User).filter(User.user_id == user.user_id).update({"role": UserRole.admin})
+    db.commit()
+    assert cache.get(db, user.user_id).role == UserRole.user
+
+    CacheVersionRepository(db).bump(USERS_CACHE_VERSION)
+    assert cache.get(db, user.user_id).role == UserRole.admin